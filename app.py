@@ -5,29 +5,93 @@ V4.1: 登录认证 + Tushare PRO 优先 + 桥水式驾驶舱 + 二波配置雷
 ================================================================
 """
 import streamlit as st
-from datetime import datetime
+import importlib
+import threading
+from datetime import date
+
+from utils.config import _secrets, _verify_login
+from utils.ui import _LOGIN_CSS
 
 st.set_page_config(page_title="寻星市场情报中心", page_icon="🔭", layout="wide")
+st.session_state.setdefault("authenticated", False)
+st.session_state.setdefault("login_user", "admin")
+
+VERSION = "V4.1"
+
+# 主页导航卡片 (3 列网格, 按顺序逐行排布; page 为空表示预留位)
+NAV_CARDS = [
+    {"icon": "📰", "title": "资讯雷达", "desc": "Tushare PRO 8源 + 新闻联播",
+     "tags": "AI分类 · 情感分析 · 主线提炼", "page": "pages/1_News.py", "label": "👉 进入资讯雷达"},
+    {"icon": "📊", "title": "FOF 驾驶舱", "desc": "桥水式宏观 · 全维度扫描",
+     "tags": "增长/通胀/流动性/信用 · 情绪", "page": "pages/2_Market.py", "label": "👉 进入驾驶舱"},
+    {"icon": "📝", "title": "CIO 日报", "desc": "AI 配置报告 · 全量数据驱动",
+     "tags": "大类配置 · FOF策略 · 风控", "page": "pages/3_Report.py", "label": "👉 进入 CIO 日报"},
+    {"icon": "📈", "title": "量化选股", "desc": "多因子模型 · 三维共振",
+     "tags": "量价 × 资金 × 技术 · AI点评", "page": "pages/4_Quant.py", "label": "👉 进入量化选股"},
+    {"icon": "🎯", "title": "二波配置雷达", "desc": "中线配置 · 强势回调狙击",
+     "tags": "市值基本面 × 极度缩量形态", "page": "pages/5_Pullback.py", "label": "👉 进入二波雷达"},
+    {"icon": "🛠️", "title": "系统自检与扩展", "desc": "(架构师预留位)",
+     "tags": "数据管道监控 · 核心指标校准", "page": None, "label": "⚙️ 模块开发中..."},
+]
+
+
+# 登录/主页停留期间后台预热的重量级模块 (pandas/numpy/openai; tushare 随数据包预热加载)
+_WARM_MODULES = ("utils.data_fetcher", "utils.ai_analyzer", "openai")
+
+
+@st.cache_resource(show_spinner=False)
+def _warm_up() -> threading.Thread:
+    """后台线程预热模块导入 (进程内只启动一次): 首次进入功能页时无需再等冷启动导入
+    登录前只做导入, 不调用任何数据接口 (未认证访问不消耗接口配额)"""
+    def _load():
+        for name in _WARM_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=_load, name="xunxing-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _prefetch_data_pack():
+    """登录成功后后台拉取日报数据包, 填充各取数缓存 (首次生成日报/进入驾驶舱时直接命中)"""
+    from utils.data_fetcher import get_daily_data_pack, prefetch
+    prefetch({"daily_pack": get_daily_data_pack})
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _day_label(day: date) -> str:
+    """侧边栏日期文本 (按自然日缓存)"""
+    return day.strftime('%Y-%m-%d %A')
+
 
 # ============================================================
 # 登录认证
 # ============================================================
+_LOGIN_CARD_HTML = _LOGIN_CSS + f"""
+<div class="xx-login-wrap"><div class="xx-login">
+<h1>🔭</h1>
+<h2>寻星市场情报中心</h2>
+<p>Xunxing Market Intelligence · {VERSION}</p>
+</div></div>
+"""
+
+
 def check_login():
     """简单登录认证"""
-    if st.session_state.get("authenticated"):
+    if st.session_state.authenticated:
         return True
 
-    st.markdown("""
-    <div style="display:flex; justify-content:center; align-items:center; min-height:55vh;">
-    <div style="width:400px; padding:40px; border-radius:16px;
-    background: linear-gradient(135deg, rgba(255,107,53,0.08), rgba(69,183,209,0.04));
-    border: 1px solid rgba(255,107,53,0.15); text-align:center;">
-    <h1 style="margin:0 0 8px;">🔭</h1>
-    <h2 style="margin:0 0 4px; color:#FF6B35;">寻星市场情报中心</h2>
-    <p style="margin:0 0 24px; color:#888; font-size:14px;">Xunxing Market Intelligence · V4.1</p>
-    </div></div>
-    """, unsafe_allow_html=True)
+    st.markdown(_LOGIN_CARD_HTML, unsafe_allow_html=True)
+    _login_form()
+    return False
 
+
+@st.fragment
+def _login_form():
+    """登录表单 (独立 fragment: 登录失败只重跑表单区域，成功后 st.rerun 整页刷新)"""
     col_l, col_c, col_r = st.columns([1, 1.5, 1])
     with col_c:
         with st.form("login_form"):
@@ -35,21 +99,15 @@ def check_login():
             password = st.text_input("密码", type="password", placeholder="请输入密码")
             submit = st.form_submit_button("🔐 登录", use_container_width=True, type="primary")
             if submit:
-                valid_user = "admin"
-                valid_pass = "281699"
-                try:
-                    valid_user = st.secrets.get("LOGIN_USER", "admin")
-                    valid_pass = st.secrets.get("LOGIN_PASS", "281699")
-                except Exception:
-                    pass
-                if username == valid_user and password == valid_pass:
+                if _verify_login(username, password):
                     st.session_state.authenticated = True
                     st.session_state.login_user = username
+                    _prefetch_data_pack()
                     st.rerun()
                 else:
                     st.error("❌ 用户名或密码错误")
-    return False
 
+_warm_up()
 if not check_login():
     st.stop()
 
@@ -58,27 +116,20 @@ if not check_login():
 # ============================================================
 with st.sidebar:
     st.title("🔭 寻星情报中心")
-    st.caption("Xunxing Market Intelligence · V4.1")
+    st.caption(f"Xunxing Market Intelligence · {VERSION}")
     st.divider()
-    st.markdown(f"📅 {datetime.now().strftime('%Y-%m-%d %A')}")
-    st.markdown(f"👤 {st.session_state.get('login_user', 'admin')}")
+    st.markdown(f"📅 {_day_label(date.today())}")
+    st.markdown(f"👤 {st.session_state.login_user}")
     st.divider()
 
-    api_key = ""
-    try:
-        api_key = st.secrets.get("DEEPSEEK_API_KEY", "")
-    except Exception:
-        pass
+    secrets = _secrets()
+    api_key = secrets["DEEPSEEK_API_KEY"]
     if api_key and not api_key.startswith("sk-xxxx"):
         st.success("🤖 AI引擎: DeepSeek ✅")
     else:
         st.warning("🤖 AI引擎: 未配置")
 
-    ts_token = ""
-    try:
-        ts_token = st.secrets.get("TUSHARE_TOKEN", "")
-    except Exception:
-        pass
+    ts_token = secrets["TUSHARE_TOKEN"]
     if ts_token:
         st.success("📡 主数据源: Tushare PRO ✅")
     else:
@@ -94,77 +145,25 @@ with st.sidebar:
 # 主页网格导航 (3x2 架构)
 # ============================================================
 st.title("🔭 寻星市场情报中心")
-st.markdown("**Xunxing Market Intelligence Center** · V4.1 · FOF CIO 决策平台")
+st.markdown(f"**Xunxing Market Intelligence Center** · {VERSION} · FOF CIO 决策平台")
 st.divider()
 
-# 第一排导航
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.markdown("""
-    ### 📰 资讯雷达
-    Tushare PRO 8源 + 新闻联播
-
-    AI分类 · 情感分析 · 主线提炼
-    """)
-    st.page_link("pages/1_News.py", label="👉 进入资讯雷达", icon="📰", use_container_width=True)
-
-with col2:
-    st.markdown("""
-    ### 📊 FOF 驾驶舱
-    桥水式宏观 · 全维度扫描
-
-    增长/通胀/流动性/信用 · 情绪
-    """)
-    st.page_link("pages/2_Market.py", label="👉 进入驾驶舱", icon="📊", use_container_width=True)
-
-with col3:
-    st.markdown("""
-    ### 📝 CIO 日报
-    AI 配置报告 · 全量数据驱动
-
-    大类配置 · FOF策略 · 风控
-    """)
-    st.page_link("pages/3_Report.py", label="👉 进入 CIO 日报", icon="📝", use_container_width=True)
-
-st.write("") # 增加排版间距
-
-# 第二排导航
-col4, col5, col6 = st.columns(3)
-
-with col4:
-    st.markdown("""
-    ### 📈 量化选股
-    多因子模型 · 三维共振
-
-    量价 × 资金 × 技术 · AI点评
-    """)
-    st.page_link("pages/4_Quant.py", label="👉 进入量化选股", icon="📈", use_container_width=True)
-
-with col5:
-    st.markdown("""
-    ### 🎯 二波配置雷达
-    中线配置 · 强势回调狙击
-
-    市值基本面 × 极度缩量形态
-    """)
-    st.page_link("pages/5_Pullback.py", label="👉 进入二波雷达", icon="🎯", use_container_width=True)
-
-with col6:
-    st.markdown("""
-    ### 🛠️ 系统自检与扩展
-    (架构师预留位)
-
-    数据管道监控 · 核心指标校准
-    """)
-    st.button("⚙️ 模块开发中...", disabled=True, use_container_width=True)
+# 单次 st.columns(3), 卡片按下标轮流落入三列 (卡片结构一致, 行自然对齐)
+nav_cols = st.columns(3)
+for i, card in enumerate(NAV_CARDS):
+    with nav_cols[i % 3]:
+        st.markdown(f"### {card['icon']} {card['title']}\n{card['desc']}\n\n{card['tags']}")
+        if card["page"]:
+            st.page_link(card["page"], label=card["label"], icon=card["icon"], use_container_width=True)
+        else:
+            st.button(card["label"], disabled=True, use_container_width=True)
 
 st.divider()
 
 # ============================================================
 # 系统更新日志 
 # ============================================================
-with st.expander("🆕 V4.1 升级内容 (当前版本)", expanded=False):
+with st.expander(f"🆕 {VERSION} 升级内容 (当前版本)", expanded=False):
     st.markdown("""
 **V4.1 架构师重构**
 - ✅ **核心逻辑修复**：量价因子计算底层强制切入前复权(qfq)流，消灭除权价格失真。
@@ -4,16 +4,95 @@
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sys, os
+from collections import defaultdict
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _root not in sys.path:  # 页面每次重跑都会执行, 避免 sys.path 重复累积
+    sys.path.insert(0, _root)
 from utils.data_fetcher import get_all_news, _tushare_available, TUSHARE_NEWS_SOURCES
-from utils.ai_analyzer import analyze_news_batch, analyze_single_news, summarize_market_threads
+from utils.ai_analyzer import analyze_news_stream, analyze_single_news, summarize_market_threads_stream
 
 st.set_page_config(page_title="资讯雷达", page_icon="📰", layout="wide")
 
+
+_IMPACT_STARS = ["", "⭐", "⭐⭐", "⭐⭐⭐", "⭐⭐⭐⭐", "⭐⭐⭐⭐⭐"]
+_TIER_BADGE = {"T0": "🏛️", "T1": "🔷", "T2": "🔹", "T3": "▫️"}
+_EXPAND_CATS = frozenset(("宏观政策", "行业产业"))
+
+
+@st.cache_data(show_spinner=False)
+def _news_view(analyzed: list) -> dict:
+    """分析结果的整表视图: 统计 / 列表行 / 排序 / 筛选列一次性向量化生成
+
+    按分析结果内容缓存, 筛选/排序/分页交互只做一次哈希查表。
+    """
+    ana = pd.json_normalize([item.get("analysis", {}) for item in analyzed])
+    ana = ana.reindex(columns=["category", "sentiment", "impact", "sectors"])
+    impact = pd.to_numeric(ana["impact"], errors="coerce")
+    # 紧凑列类型: 分类用 category, 影响力 int8 (缺失按 0 参与排序), 排序/筛选走连续内存
+    df = pd.DataFrame({
+        "time": [item.get("time", "") for item in analyzed],
+        "source": [item.get("source", "") for item in analyzed],
+        "tier": [item.get("tier", "") for item in analyzed],
+        "title": [item.get("title", "") for item in analyzed],
+        "category": pd.Categorical(ana["category"].fillna("其他")),
+        "sentiment": pd.to_numeric(ana["sentiment"], errors="coerce").fillna(0).to_numpy(),
+        "impact": impact.fillna(0).clip(0, 5).astype("int8").to_numpy(),
+    })
+    sents = df["sentiment"].to_numpy()
+
+    # 列表行 markdown (情感/星级/来源徽章整列计算)
+    stars = impact.fillna(1).clip(0, 5).astype(int).map(_IMPACT_STARS.__getitem__)
+    secs = [
+        f"关联行业: {' '.join(f'`{sec}`' for sec in v)}\n\n" if isinstance(v, list) and v else ""
+        for v in ana["sectors"]
+    ]
+    rows = ("**" + df["time"] + "** · " + df["tier"].map(_TIER_BADGE).fillna("") + "**[" + df["source"]
+            + "]** · " + ana["category"].fillna("") + " · "
+            + np.where(sents > 0.2, "🟢", np.where(sents < -0.2, "🔴", "⚪"))
+            + " " + [f"{v:+.2f}" for v in sents] + " · " + stars + "\n\n> " + df["title"]
+            + "\n\n" + secs + "---\n\n").tolist()
+
+    # 降序稳定排序 (同分保持原时间顺序)
+    def _order(col):
+        return df[col].sort_values(ascending=False, kind="stable").index.to_numpy()
+
+    return {
+        "category": df["category"],
+        "source": df["source"],
+        "sources": sorted(df["source"].unique()),
+        "rows": rows,
+        "orders": {
+            "时间": np.arange(len(df)),
+            "影响↓": _order("impact"),
+            "情感↓": _order("sentiment"),
+        },
+        "stats": {
+            "cats": df["category"].value_counts().to_dict(),
+            "secs": ana["sectors"].explode().dropna().value_counts().to_dict(),
+            "avg": float(sents.mean()) if len(sents) else 0,
+            "pos": int((sents > 0.1).sum()),
+            "neg": int((sents < -0.1).sum()),
+        },
+    }
+
+
+@st.cache_data(show_spinner=False)
+def _bar_spec(pairs: tuple, value_label: str) -> dict:
+    """条形图 Vega-Lite 规格 (按 (名称, 数量) 元组缓存, 计数不变时重跑直接复用)"""
+    import altair as alt
+    df = pd.DataFrame(pairs, columns=["名称", value_label])
+    return alt.Chart(df).mark_bar().encode(
+        x=alt.X(f"{value_label}:Q"),
+        y=alt.Y("名称:N", sort="-x", title=None),
+    ).properties(height=200).to_dict()
+
+
 # 登录检查
-if not st.session_state.get("authenticated"):
+st.session_state.setdefault("authenticated", False)
+if not st.session_state.authenticated:
     st.warning("请先登录")
     st.page_link("app.py", label="🔐 返回登录", icon="🏠")
     st.stop()
@@ -40,30 +119,32 @@ if "raw_news" not in st.session_state:
     st.session_state.raw_news = []
 if "analyzed_news" not in st.session_state:
     st.session_state.analyzed_news = []
+st.session_state.setdefault("_fetched_once", False)
 
-# 采集
-if fetch_btn or not st.session_state.raw_news:
+# 采集 (首次进入自动采集一次，之后仅按钮触发，其他控件引起的重跑不再请求网络)
+if fetch_btn or (not st.session_state.raw_news and not st.session_state._fetched_once):
+    st.session_state._fetched_once = True
     with st.spinner(f"📡 正在从 8 个新闻源并行采集并去重过滤..."):
-        news = get_all_news(tushare_count=news_count)
+        # 按 50 条粒度向上取整采集再截断，不同滑块档位共享同一份缓存
+        fetch_count = -(-news_count // 50) * 50
+        news = get_all_news(tushare_count=fetch_count)[:news_count]
+        news_df = pd.DataFrame(news).reindex(columns=["title", "time", "source", "important"])
+        if news:
+            # 标题+时间哈希去重 (跨源同一条快讯只保留首条)
+            keep = ~pd.util.hash_pandas_object(news_df[["title", "time"]].astype(str), index=False).duplicated().to_numpy()
+            news = [n for n, k in zip(news, keep) if k]
+            news_df = news_df[keep]
         st.session_state.raw_news = news
         st.session_state.analyzed_news = []
     if news:
-        src_counts = {}
-        cat_counts = {}
-        important_count = 0
-        for n in news:
-            src = n.get("source", "未知")
-            src_counts[src] = src_counts.get(src, 0) + 1
-            cat = n.get("category", "未知")
-            cat_counts[cat] = cat_counts.get(cat, 0) + 1
-            if n.get("important"):
-                important_count += 1
+        src_counts = news_df["source"].fillna("未知").value_counts().to_dict()
+        important_count = int(news_df["important"].fillna(False).astype(bool).sum())
 
         st.success(f"✅ 采集完成 {len(news)} 条高价值资讯 (重要 {important_count} 条)")
 
         with st.container(border=True):
             src_cols = st.columns(min(len(src_counts), 6))
-            for i, (src, cnt) in enumerate(sorted(src_counts.items(), key=lambda x: -x[1])):
+            for i, (src, cnt) in enumerate(src_counts.items()):
                 src_cols[i % len(src_cols)].metric(src, f"{cnt}条")
     else:
         st.warning("未采集到资讯，请检查 Tushare Token 配置")
@@ -86,43 +167,38 @@ with col_a3:
     summarize_btn = st.button("🔥 一键提炼核心主线", type="primary", use_container_width=True)
 
 if summarize_btn:
-    with st.spinner(f"🤖 DeepSeek 正在分析 {len(raw_news)} 条多源资讯，提炼投资主线..."):
-        threads_report = summarize_market_threads(raw_news)
-        st.markdown("""
-        <div style="padding:16px 20px; border-radius:10px;
-        background: linear-gradient(135deg, rgba(255,107,53,0.1), rgba(69,183,209,0.05));
-        border: 1px solid rgba(255,107,53,0.2); margin-bottom:20px;">
-        """, unsafe_allow_html=True)
-        st.markdown(threads_report)
-        st.markdown("</div>", unsafe_allow_html=True)
+    # 流式输出: 首段文字约 1 秒内出现, 不必等待整篇生成
+    with st.container(border=True):
+        st.write_stream(summarize_market_threads_stream(raw_news))
 
 if analyze_btn:
-    with st.spinner(f"🤖 DeepSeek 正在逐条分析 {len(raw_news)} 条资讯..."):
-        analyzed = analyze_news_batch(raw_news)
-        st.session_state.analyzed_news = analyzed
-        st.success(f"✅ 完成 {len(analyzed)} 条结构化分析")
+    # 分批并行分析, 每完成一批刷新进度 (结果按原顺序拼回)
+    progress = st.progress(0.0, text=f"🤖 DeepSeek 正在逐条分析 {len(raw_news)} 条资讯...")
+    chunks, done = {}, 0
+    for start, batch in analyze_news_stream(raw_news):
+        chunks[start] = batch
+        done += len(batch)
+        progress.progress(done / len(raw_news), text=f"🤖 已分析 {done}/{len(raw_news)} 条")
+    progress.empty()
+    analyzed = [item for start in sorted(chunks) for item in chunks[start]]
+    st.session_state.analyzed_news = analyzed
+    st.success(f"✅ 完成 {len(analyzed)} 条结构化分析")
 
 analyzed = st.session_state.analyzed_news
 
 # ============================================================
 # 展示
 # ============================================================
-if analyzed:
+@st.fragment
+def _render_analysis(analyzed: list):
+    """分析结果展示 (独立 fragment: 筛选/排序/分页交互只重跑本区域)"""
     st.divider()
     st.subheader("📊 分析统计")
 
-    cats, sents, all_secs = {}, [], {}
-    for item in analyzed:
-        a = item.get("analysis", {})
-        cat = a.get("category", "其他")
-        cats[cat] = cats.get(cat, 0) + 1
-        sents.append(a.get("sentiment", 0))
-        for s in a.get("sectors", []):
-            all_secs[s] = all_secs.get(s, 0) + 1
-
-    avg_s = sum(sents) / len(sents) if sents else 0
-    pos_n = sum(1 for s in sents if s > 0.1)
-    neg_n = sum(1 for s in sents if s < -0.1)
+    view = _news_view(analyzed)
+    stats = view["stats"]
+    cats, all_secs = stats["cats"], stats["secs"]
+    avg_s, pos_n, neg_n = stats["avg"], stats["pos"], stats["neg"]
 
     m1, m2, m3, m4 = st.columns(4)
     m1.metric("资讯总数", f"{len(analyzed)}")
@@ -135,11 +211,11 @@ if analyzed:
     with cc1:
         st.markdown("**分类分布**")
         if cats:
-            st.bar_chart(pd.DataFrame({"数量": cats}).sort_values("数量", ascending=False), height=200)
+            st.vega_lite_chart(_bar_spec(tuple(cats.items()), "数量"), use_container_width=True)
     with cc2:
         st.markdown("**热门行业**")
         if all_secs:
-            st.bar_chart(pd.DataFrame({"提及": all_secs}).sort_values("提及", ascending=False), height=200)
+            st.vega_lite_chart(_bar_spec(tuple(all_secs.items()), "提及"), use_container_width=True)
 
     st.divider()
     st.subheader("📋 资讯列表")
@@ -148,60 +224,68 @@ if analyzed:
     with col_f1:
         filter_cat = st.multiselect("按分类筛选", list(cats.keys()), default=list(cats.keys()))
     with col_f2:
-        all_sources = list(set(item.get("source", "") for item in analyzed))
-        filter_src = st.multiselect("按来源筛选", all_sources, default=all_sources)
+        filter_src = st.multiselect("按来源筛选", view["sources"], default=view["sources"])
     with col_f3:
         sort_opt = st.radio("排序", ["时间", "影响↓", "情感↓"], horizontal=True)
 
-    filtered = [item for item in analyzed
-                if item.get("analysis", {}).get("category", "其他") in filter_cat
-                and item.get("source", "") in filter_src]
-
-    if sort_opt == "影响↓":
-        filtered.sort(key=lambda x: x.get("analysis", {}).get("impact", 0), reverse=True)
-    elif sort_opt == "情感↓":
-        filtered.sort(key=lambda x: x.get("analysis", {}).get("sentiment", 0), reverse=True)
-
-    for i, item in enumerate(filtered):
-        a = item.get("analysis", {})
-        s = a.get("sentiment", 0)
-        emoji = "🟢" if s > 0.2 else ("🔴" if s < -0.2 else "⚪")
-        sectors_str = " ".join(f"`{sec}`" for sec in a.get("sectors", []))
-        src = item.get("source", "")
-        tier = item.get("tier", "")
-        tier_badge = {"T0": "🏛️", "T1": "🔷", "T2": "🔹", "T3": "▫️"}.get(tier, "")
-
-        st.markdown(f"**{item.get('time','')}** · {tier_badge}**[{src}]** · {a.get('category','')} · {emoji} {s:+.2f} · {'⭐'*a.get('impact',1)}")
-        st.markdown(f"> {item.get('title','')}")
-        if sectors_str:
-            st.caption(f"关联行业: {sectors_str}")
-
-        with st.expander("详情 & 深度分析", expanded=False):
-            st.markdown(item.get("content", "")[:500])
-            if a.get("summary"):
-                st.info(f"AI摘要: {a['summary']}")
-            if st.button(f"🔍 FOF视角深度分析", key=f"d_{i}"):
-                with st.spinner("分析中..."):
-                    result = analyze_single_news(f"{item.get('title','')}\n{item.get('content','')}")
-                    st.markdown(result)
-        st.markdown("---")
+    # 布尔掩码筛选, 再按排序下标取出命中项
+    mask = (view["category"].isin(filter_cat) & view["source"].isin(filter_src)).to_numpy()
+    order = view["orders"][sort_opt]
+    filtered = order[mask[order]]
+
+    # 分页 + 整页一次性渲染 (每条资讯不再单独发送多个组件)
+    col_p1, col_p2 = st.columns([3, 1])
+    with col_p1:
+        page_size = st.slider("每页", 20, 100, 30, step=10)
+    n_pages = max(1, -(-len(filtered) // page_size))
+    with col_p2:
+        page = st.number_input(f"页码 (共 {n_pages} 页)", min_value=1, max_value=n_pages, value=1)
+    page_idx = filtered[(page - 1) * page_size: page * page_size]
+    page_items = [analyzed[i] for i in page_idx]
+
+    rows = view["rows"]
+    # 标题/来源/行业均来自外部数据源, 按普通 markdown 渲染 (HTML 被转义)
+    st.markdown("".join(rows[i] for i in page_idx))
+
+    # 深度分析: 单个选择框替代逐条按钮
+    if page_items:
+        st.subheader("🔍 详情 & 深度分析")
+        pick = st.selectbox("选择深度分析", range(len(page_items)),
+                            format_func=lambda i: f"{page_items[i].get('time','')} · {page_items[i].get('title','')[:60]}")
+        _news_detail(page_items[pick])
 
+
+@st.fragment
+def _news_detail(item: dict):
+    """单条详情 + FOF 视角深度分析 (独立 fragment: 点击分析只重跑本区域, 结果存入 session_state 保留)"""
+    a = item.get("analysis", {})
+    st.markdown(item.get("content", "")[:500])
+    if a.get("summary"):
+        st.info(f"AI摘要: {a['summary']}")
+
+    deep_key = f"deep_{hash((item.get('time', ''), item.get('title', '')))}"
+    if st.button("🔍 FOF视角深度分析"):
+        with st.spinner("分析中..."):
+            st.session_state[deep_key] = analyze_single_news(f"{item.get('title','')}\n{item.get('content','')}")
+    if deep_key in st.session_state:
+        st.markdown(st.session_state[deep_key])
+
+
+if analyzed:
+    _render_analysis(analyzed)
 else:
     st.subheader("📋 原始资讯")
     st.info("💡 点击「🔥 一键提炼核心主线」或「⚡ 逐条结构化分析」启用 AI 引擎")
 
-    cat_groups = {}
+    cat_groups = defaultdict(list)
     for item in raw_news:
-        cat = item.get("category", "综合财经")
-        if cat not in cat_groups:
-            cat_groups[cat] = []
-        cat_groups[cat].append(item)
+        cat_groups[item.get("category", "综合财经")].append(item)
 
     for cat, items in cat_groups.items():
-        with st.expander(f"📂 {cat} ({len(items)}条)", expanded=(cat in ("宏观政策", "行业产业"))):
-            for item in items:
-                src = item.get("source", "")
-                important = "⭐ " if item.get("important") else ""
-                tier = item.get("tier", "")
-                tier_badge = {"T0": "🏛️", "T1": "🔷", "T2": "🔹", "T3": "▫️"}.get(tier, "")
-                st.markdown(f"**{item.get('time','')}** · {tier_badge}**[{src}]** · {important}{item.get('title','')}")
+        with st.expander(f"📂 {cat} ({len(items)}条)", expanded=(cat in _EXPAND_CATS)):
+            # 每个分类一次 markdown (逐条一行)
+            st.markdown("\n\n".join(
+                f"**{item.get('time','')}** · {_TIER_BADGE.get(item.get('tier', ''), '')}**[{item.get('source','')}]** · "
+                f"{'⭐ ' if item.get('important') else ''}{item.get('title','')}"
+                for item in items
+            ))
@@ -6,24 +6,35 @@ V4: 全量数据驱动 + 数据质量审计 + 桥水四维框架
 """
 import streamlit as st
 import json
+import gzip
 import os
 from datetime import datetime
 import sys
+try:
+    import orjson  # 可选: 中文长文本序列化快数倍
+except ImportError:
+    orjson = None
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_fetcher import (
-    get_daily_data_pack, pack_market_text, pack_news_text,
-    _tushare_available, get_sentiment_temperature,
-)
-from utils.ai_analyzer import generate_daily_report
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _root not in sys.path:  # 页面每次重跑都会执行, 避免 sys.path 重复累积
+    sys.path.insert(0, _root)
+from utils.ui import _CARD_CSS
 
 st.set_page_config(page_title="CIO 日报", page_icon="📝", layout="wide")
 
-if not st.session_state.get("authenticated"):
+st.session_state.setdefault("authenticated", False)
+if not st.session_state.authenticated:
     st.warning("请先登录")
     st.page_link("app.py", label="🔐 返回登录", icon="🏠")
     st.stop()
 
+# 登录后再导入取数模块: 未登录访问不承担 tushare 等重型依赖的导入开销
+from utils.data_fetcher import (
+    get_daily_data_pack, pack_market_text, pack_news_text,
+    _tushare_available, get_sentiment_temperature, DATA_DIR,
+)
+from utils.ai_analyzer import generate_daily_report, _get_api_key
+
 st.title("📝 寻星 CIO 日报")
 st.caption("AI 全量数据驱动 · 桥水四维宏观 · 大类配置 · FOF策略 · 风控预案")
 st.divider()
@@ -31,12 +42,7 @@ st.divider()
 # ============================================================
 # 状态检查
 # ============================================================
-api_key = ""
-try:
-    api_key = st.secrets.get("DEEPSEEK_API_KEY", "")
-except Exception:
-    pass
-has_api = bool(api_key and not api_key.startswith("sk-xxxx"))
+has_api = bool(_get_api_key())
 has_tushare = _tushare_available()
 
 col_s1, col_s2 = st.columns(2)
@@ -68,24 +74,84 @@ st.divider()
 # ============================================================
 # 缓存
 # ============================================================
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
-os.makedirs(DATA_DIR, exist_ok=True)
-today_file = os.path.join(DATA_DIR, f"report_{datetime.now().strftime('%Y%m%d')}.json")
+# 本次运行的日期只取一次, 缓存文件名/报告抬头/下载文件名共用
+today = datetime.now()
+today_str = today.strftime("%Y%m%d")
+today_file = os.path.join(DATA_DIR, f"report_{today_str}.json.gz")
+legacy_file = os.path.join(DATA_DIR, f"report_{today_str}.json")  # 旧版未压缩缓存, 仅读取
+_CACHE_KEY = f"_report_cache_{today_str}"  # 会话内按日期缓存, 每个会话每天只读一次磁盘
+
+
+# 报告抬头 (样式取 utils.ui 的 .xx-card 规则, 与卡片同段输出; 这里只填日期与数据源)
+_HEADER_TPL = """<div class="xx-card">
+<h2>🔭 寻星 FOF CIO 日报</h2>
+<p>{date} · DeepSeek V3 · 桥水四维框架 · 数据源: {src}</p>
+</div>"""
+
+# 数据审计项: (数据包键, 名称, 计数单位 (None 不计数), 是否核心维度 — 核心缺失标 ❌, 其余标 ⚠️)
+_AUDIT_SPEC = [
+    ("indices", "指数", None, True),
+    ("overview", "涨跌", None, True),
+    ("macro", "宏观", "项", True),
+    ("liquidity", "流动性", "项", False),
+    ("credit", "信用", None, False),
+    ("style", "风格", "项", True),
+    ("volatility", "波动率", None, False),
+    ("northbound", "北向", None, False),
+    ("margin", "融资", None, False),
+    ("futures", "期货", "品种", False),
+    ("news", "资讯", "条", True),
+    ("research", "研报", "条", False),
+]
+
+
+def _audit(data_pack: dict, spec: list = _AUDIT_SPEC) -> tuple:
+    """按审计表逐项检查数据包 → (审计标记列表, 有效维度数)"""
+    marks, count = [], 0
+    for key, label, unit, required in spec:
+        value = data_pack.get(key)
+        ok = not value.empty if hasattr(value, "empty") else bool(value)
+        if ok:
+            marks.append(f"✅{label}({len(value)}{unit})" if unit else f"✅{label}")
+            count += 1
+        else:
+            marks.append(f"❌{label}" if required else f"⚠️{label}(缺)")
+    return marks, count
+
+
+@st.cache_data(show_spinner=False)
+def _to_txt(md: str) -> str:
+    """Markdown 报告 → 纯文本下载版 (按报告内容缓存, 每份报告只转换一次)"""
+    return md.replace("###", "").replace("**", "")
 
 
 def load_cache():
     if os.path.exists(today_file):
-        with open(today_file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return None
+        with gzip.open(today_file, "rb") as f:
+            raw = f.read()
+    elif os.path.exists(legacy_file):
+        with open(legacy_file, "rb") as f:
+            raw = f.read()
+    else:
+        return None
+    return orjson.loads(raw) if orjson else json.loads(raw)
 
 
 def save_cache(data):
-    with open(today_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    st.session_state[_CACHE_KEY] = data
+    if orjson:
+        raw = orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        raw = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+    # 报告正文为大段中文 Markdown, gzip 后体积通常缩小一半以上
+    with gzip.open(today_file, "wb", compresslevel=6) as f:
+        f.write(raw)
 
 
-cached = load_cache()
+cached = st.session_state.get(_CACHE_KEY)
+if cached is None:
+    cached = load_cache() or {}
+    st.session_state[_CACHE_KEY] = cached
 if cached:
     st.info(f"📄 已有今日缓存（{cached.get('time', '')}）· 数据维度: {cached.get('data_dimensions', '?')} · 数据源: {cached.get('data_sources', '?')}")
 
@@ -104,95 +170,34 @@ report = None
 # 生成报告
 # ============================================================
 if gen_btn and has_api:
-    progress = st.progress(0, "准备中...")
+    status = st.status("准备中...", expanded=True)
 
     # Stage 1: 全量数据采集
-    progress.progress(10, "📡 采集全量数据: 行情+宏观+流动性+信用+波动率+资金+期货+资讯+研报...")
+    status.update(label="📡 采集全量数据: 行情+宏观+流动性+信用+波动率+资金+期货+资讯+研报...")
     data_pack = get_daily_data_pack()
 
     # 数据质量审计
-    data_audit = []
-    dim_count = 0
-    if data_pack.get("indices") is not None and not data_pack["indices"].empty:
-        data_audit.append("✅指数")
-        dim_count += 1
-    else:
-        data_audit.append("❌指数")
-    if data_pack.get("overview"):
-        data_audit.append("✅涨跌")
-        dim_count += 1
-    else:
-        data_audit.append("❌涨跌")
-    if data_pack.get("macro"):
-        data_audit.append(f"✅宏观({len(data_pack['macro'])}项)")
-        dim_count += 1
-    else:
-        data_audit.append("❌宏观")
-    if data_pack.get("liquidity"):
-        data_audit.append(f"✅流动性({len(data_pack['liquidity'])}项)")
-        dim_count += 1
-    else:
-        data_audit.append("⚠️流动性(缺)")
-    if data_pack.get("credit"):
-        data_audit.append("✅信用")
-        dim_count += 1
-    else:
-        data_audit.append("⚠️信用(缺)")
-    if data_pack.get("style"):
-        data_audit.append(f"✅风格({len(data_pack['style'])}项)")
-        dim_count += 1
-    else:
-        data_audit.append("❌风格")
-    if data_pack.get("volatility"):
-        data_audit.append("✅波动率")
-        dim_count += 1
-    else:
-        data_audit.append("⚠️波动率(缺)")
-    if data_pack.get("northbound"):
-        data_audit.append("✅北向")
-        dim_count += 1
-    else:
-        data_audit.append("⚠️北向(缺)")
-    if data_pack.get("margin"):
-        data_audit.append("✅融资")
-        dim_count += 1
-    else:
-        data_audit.append("⚠️融资(缺)")
-    if data_pack.get("futures"):
-        data_audit.append(f"✅期货({len(data_pack['futures'])}品种)")
-        dim_count += 1
-    else:
-        data_audit.append("⚠️期货(缺)")
-    if data_pack.get("news"):
-        data_audit.append(f"✅资讯({len(data_pack['news'])}条)")
-        dim_count += 1
-    else:
-        data_audit.append("❌资讯")
-    if data_pack.get("research"):
-        data_audit.append(f"✅研报({len(data_pack['research'])}条)")
-        dim_count += 1
-    else:
-        data_audit.append("⚠️研报(缺)")
+    data_audit, dim_count = _audit(data_pack)
 
-    progress.progress(40, f"📊 数据审计完成: {dim_count}/12 维度 | {' '.join(data_audit)}")
+    status.write(f"📊 数据审计完成: {dim_count}/{len(_AUDIT_SPEC)} 维度 | {' '.join(data_audit)}")
 
     # Stage 2: 数据打包
-    progress.progress(50, "📦 数据打包 (桥水四维 + 全量市场)...")
+    status.update(label="📦 数据打包 (桥水四维 + 全量市场)...")
     market_text = pack_market_text(data_pack)
     news_text = pack_news_text(data_pack)
 
     # 显示数据输入规模
     total_chars = len(market_text) + len(news_text)
-    st.caption(f"📏 AI 输入规模: 市场数据 {len(market_text)} 字 + 资讯 {len(news_text)} 字 = {total_chars} 字")
+    status.caption(f"📏 AI 输入规模: 市场数据 {len(market_text)} 字 + 资讯 {len(news_text)} 字 = {total_chars} 字")
 
     # Stage 3: AI 生成
-    progress.progress(60, "🤖 DeepSeek 正在生成 CIO 配置报告 (桥水四维框架)...")
+    status.update(label="🤖 DeepSeek 正在生成 CIO 配置报告 (桥水四维框架)...")
     report = generate_daily_report(market_text, news_text)
 
     # Stage 4: 保存
-    progress.progress(90, "💾 保存...")
+    status.update(label="💾 保存...")
     data_sources = "Tushare PRO (主) + AKShare (辅)" if has_tushare else "AKShare"
-    save_cache({
+    cached = {
         "time": datetime.now().strftime("%H:%M"),
         "report": report,
         "data_sources": data_sources,
@@ -202,9 +207,10 @@ if gen_btn and has_api:
         "news_count": len(data_pack.get("news", [])),
         "research_count": len(data_pack.get("research", [])),
         "input_chars": total_chars,
-    })
+    }
+    save_cache(cached)
 
-    progress.progress(100, "✅ 完成!")
+    status.update(label="✅ 完成!", state="complete", expanded=False)
     st.balloons()
 
 elif load_btn and cached:
@@ -216,13 +222,9 @@ elif load_btn and cached:
 if report:
     st.divider()
 
-    st.markdown(f"""
-<div style="padding:16px 20px; border-radius:10px;
-background: linear-gradient(135deg, rgba(255,107,53,0.12), rgba(69,183,209,0.06));
-border: 1px solid rgba(255,107,53,0.25); margin-bottom:20px;">
-<h2 style="margin:0; color:#FF6B35;">🔭 寻星 FOF CIO 日报</h2>
-<p style="margin:4px 0 0; color:#999;">{datetime.now().strftime('%Y年%m月%d日')} · DeepSeek V3 · 桥水四维框架 · 数据源: {'Tushare PRO + AKShare' if has_tushare else 'AKShare'}</p>
-</div>""", unsafe_allow_html=True)
+    st.markdown(_CARD_CSS + _HEADER_TPL.format(date=today.strftime('%Y年%m月%d日'),
+                                               src="Tushare PRO + AKShare" if has_tushare else "AKShare"),
+                unsafe_allow_html=True)
 
     st.markdown(report)
     st.divider()
@@ -232,22 +234,22 @@ border: 1px solid rgba(255,107,53,0.25); margin-bottom:20px;">
         st.download_button(
             "📄 下载 Markdown",
             report,
-            f"寻星CIO日报_{datetime.now().strftime('%Y%m%d')}.md",
+            f"寻星CIO日报_{today_str}.md",
             "text/markdown",
             use_container_width=True,
         )
     with c2:
         st.download_button(
             "📝 下载 TXT",
-            report.replace("###", "").replace("**", ""),
-            f"寻星CIO日报_{datetime.now().strftime('%Y%m%d')}.txt",
+            _to_txt(report),
+            f"寻星CIO日报_{today_str}.txt",
             "text/plain",
             use_container_width=True,
         )
 
     with st.expander("🔍 数据质量审计"):
         if cached:
-            st.markdown(f"- 数据维度: **{cached.get('data_dimensions', '?')}/12**")
+            st.markdown(f"- 数据维度: **{cached.get('data_dimensions', '?')}/{len(_AUDIT_SPEC)}**")
             audit = cached.get("data_audit", [])
             if audit:
                 st.markdown(f"- 详情: {' | '.join(audit)}")
@@ -279,4 +281,4 @@ else:
         """)
 
 st.divider()
-st.caption(f"寻星配置跟踪系统 · V4 · {datetime.now().strftime('%H:%M:%S')}")
+st.caption(f"寻星配置跟踪系统 · V4 · {today.strftime('%H:%M:%S')}")
@@ -11,23 +11,45 @@ import numpy as np
 from datetime import datetime
 import sys, os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_fetcher import (
-    _tushare_available, get_market_snapshot, get_multi_stock_daily,
-    get_market_moneyflow, get_industry_moneyflow,
-    calc_technical_factors, calc_moneyflow_factors,
-    quant_stock_screener, get_stock_daily, get_stock_moneyflow,
-)
-from utils.ai_analyzer import _get_api_key, _call_deepseek
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _root not in sys.path:  # 页面每次重跑都会执行, 避免 sys.path 重复累积
+    sys.path.insert(0, _root)
 
 st.set_page_config(page_title="量化选股", page_icon="📈", layout="wide")
 
 # 登录检查
-if not st.session_state.get("authenticated"):
+st.session_state.setdefault("authenticated", False)
+if not st.session_state.authenticated:
     st.warning("请先登录")
     st.page_link("app.py", label="🔐 返回登录", icon="🏠")
     st.stop()
 
+# 登录后再导入取数模块: 未登录访问不承担 tushare 等重型依赖的导入开销
+from utils.data_fetcher import _tushare_available
+from utils.ai_analyzer import _get_api_key, _call_deepseek
+
+# AI 点评摘要: 中文列名不是合法标识符, 先映射为英文字段再走 itertuples
+_SUMMARY_FIELDS = {
+    "ts_code": "ts_code", "名称": "name", "行业": "industry", "综合得分": "score", "涨跌幅": "chg",
+    "动量_20日": "momentum", "量比_5/20": "vol_ratio", "MACD金叉": "macd", "均线多头": "ma", "RSI_14": "rsi",
+    "主力净流入_5日": "money5", "主力连续流入天数": "consec", "20日新高": "new_high",
+}
+# 缺列/缺值的填充: 数值格式化与标志位字段填 0, 其余填空串
+_SUMMARY_DEFAULTS = {**dict.fromkeys(_SUMMARY_FIELDS, ""),
+                     **dict.fromkeys(("综合得分", "涨跌幅", "MACD金叉", "均线多头", "20日新高"), 0)}
+
+
+def _format_row(r) -> str:
+    """TOP10 单只股票 → prompt 摘要段落"""
+    return (
+        f"\n{r.name}({r.ts_code}) | 行业:{r.industry} | 得分:{r.score:.1f}"
+        f"\n  今日涨幅:{r.chg:+.2f}% | 20日动量:{r.momentum}% | 量比:{r.vol_ratio}"
+        f"\n  MACD:{'金叉' if r.macd == 1 else '非金叉'} | 均线:{'多头' if r.ma == 1 else '非多头'}"
+        f" | RSI:{r.rsi} | 20日新高:{'是' if r.new_high == 1 else '否'}"
+        f"\n  主力5日净流入:{r.money5} | 连续流入:{r.consec}天\n"
+    )
+
+
 st.title("📈 寻星量化选股模型")
 st.caption("三维共振: 量价趋势 × 资金流向 × 技术形态 | 多因子加权打分 → 强势股 TOP 30")
 
@@ -104,6 +126,9 @@ if "quant_industry_flow" not in st.session_state:
 # 执行选股
 # ============================================================
 if run_btn:
+    # 选股专用函数只在点击后导入
+    from utils.data_fetcher import get_industry_moneyflow, quant_stock_screener
+
     st.divider()
 
     # Phase 1: 行业资金扫描
@@ -121,16 +146,12 @@ if run_btn:
                 tc1, tc2 = st.columns(2)
                 with tc1:
                     st.markdown("**🟢 净流入 TOP5**")
-                    for _, r in top5.iterrows():
-                        name = r.get("industry_name", "")
-                        net = float(r.get("net_amount", 0))
-                        st.caption(f"🟢 {name}: {net/1e4:+,.0f}万")
+                    for name, net in zip(top5["industry_name"].to_numpy(), top5["net_amount"].to_numpy()):
+                        st.caption(f"🟢 {name}: {float(net)/1e4:+,.0f}万")
                 with tc2:
                     st.markdown("**🔴 净流出 TOP5**")
-                    for _, r in bot5.iterrows():
-                        name = r.get("industry_name", "")
-                        net = float(r.get("net_amount", 0))
-                        st.caption(f"🔴 {name}: {net/1e4:+,.0f}万")
+                    for name, net in zip(bot5["industry_name"].to_numpy(), bot5["net_amount"].to_numpy()):
+                        st.caption(f"🔴 {name}: {float(net)/1e4:+,.0f}万")
             else:
                 show_cols = [c for c in ind_flow.columns[:6]]
                 st.dataframe(ind_flow[show_cols].head(10), use_container_width=True)
@@ -185,9 +206,10 @@ if result is not None and not result.empty:
 
     # 主表格
     st.markdown("**📋 综合排名**")
-    show_df = result[available_display + available_factors].copy() if available_factors else result[available_display].copy()
+    # 直接交给 st.dataframe 按 column_order 选列: 不再为展示切片拷贝整张因子表 (行索引即排名, 保留显示)
     st.dataframe(
-        show_df,
+        result,
+        column_order=available_display + available_factors,
         use_container_width=True,
         height=min(len(result) * 38 + 40, 800),
         column_config={
@@ -208,11 +230,12 @@ if result is not None and not result.empty:
                 st.bar_chart(ind_dist, height=250)
         with col_c2:
             st.markdown("**📊 得分分布**")
-            if len(result) >= 3:
-                score_bins = pd.cut(result["综合得分"], bins=5)
-                dist = score_bins.value_counts().sort_index()
-                dist.index = [str(x) for x in dist.index]
-                st.bar_chart(dist, height=250)
+            scores = result["综合得分"].to_numpy(dtype=np.float64)
+            scores = scores[np.isfinite(scores)]  # 因子缺失会产生 NaN 得分, np.histogram 遇 NaN 直接报错
+            if len(scores) >= 3:
+                counts, edges = np.histogram(scores, bins=5)
+                labels = [f"{lo:.1f}-{hi:.1f}" for lo, hi in zip(edges[:-1], edges[1:])]
+                st.bar_chart(pd.Series(counts, index=labels), height=250)
 
     # ============================================================
     # Phase 3: AI 深度点评 (可选)
@@ -223,27 +246,9 @@ if result is not None and not result.empty:
     if _get_api_key():
         ai_btn = st.button("⚡ DeepSeek 深度分析 TOP 10", type="primary")
         if ai_btn:
-            top10 = result.head(10)
-            stock_summary = ""
-            for _, row in top10.iterrows():
-                ts_code = row.get("ts_code", "")
-                name = row.get("名称", "")
-                industry = row.get("行业", "")
-                score = row.get("综合得分", 0)
-                chg = row.get("涨跌幅", 0)
-                momentum = row.get("动量_20日", "")
-                vol_ratio = row.get("量比_5/20", "")
-                macd = "金叉" if row.get("MACD金叉", 0) == 1 else "非金叉"
-                ma = "多头" if row.get("均线多头", 0) == 1 else "非多头"
-                rsi = row.get("RSI_14", "")
-                money5 = row.get("主力净流入_5日", "")
-                consec = row.get("主力连续流入天数", "")
-                new_high = "是" if row.get("20日新高", 0) == 1 else "否"
-
-                stock_summary += f"\n{name}({ts_code}) | 行业:{industry} | 得分:{score:.1f}"
-                stock_summary += f"\n  今日涨幅:{chg:+.2f}% | 20日动量:{momentum}% | 量比:{vol_ratio}"
-                stock_summary += f"\n  MACD:{macd} | 均线:{ma} | RSI:{rsi} | 20日新高:{new_high}"
-                stock_summary += f"\n  主力5日净流入:{money5} | 连续流入:{consec}天\n"
+            top10 = (result.head(10).reindex(columns=list(_SUMMARY_FIELDS))
+                     .fillna(_SUMMARY_DEFAULTS).rename(columns=_SUMMARY_FIELDS))
+            stock_summary = "".join(_format_row(r) for r in top10.itertuples(index=False))
 
             with st.spinner("🤖 DeepSeek 正在分析 TOP 10 强势股..."):
                 prompt = f"""作为寻星FOF的CIO，基于以下量化选股模型输出的TOP 10强势股，给出专业点评。
@@ -274,13 +279,8 @@ if result is not None and not result.empty:
                     "你是寻星FOF的CIO，擅长量化分析和技术分析，给出专业但简洁的投资点评。",
                     temperature=0.3, max_tokens=3000)
 
-                st.markdown("""
-                <div style="padding:16px 20px; border-radius:10px;
-                background: linear-gradient(135deg, rgba(255,107,53,0.1), rgba(69,183,209,0.05));
-                border: 1px solid rgba(255,107,53,0.2);">
-                """, unsafe_allow_html=True)
-                st.markdown(ai_result)
-                st.markdown("</div>", unsafe_allow_html=True)
+                with st.container(border=True):
+                    st.markdown(ai_result)
     else:
         st.info("💡 配置 DeepSeek API Key 后可启用 AI 深度点评")
 
@@ -290,7 +290,9 @@ if result is not None and not result.empty:
     st.divider()
     st.subheader("🔍 个股因子详情")
 
-    stock_options = [f"{row.get('名称', '')} ({row.get('ts_code', '')})" for _, row in result.head(20).iterrows()]
+    top20 = result.head(20)
+    blank = pd.Series("", index=top20.index)
+    stock_options = [f"{name} ({code})" for name, code in zip(top20.get("名称", blank), top20.get("ts_code", blank))]
     if stock_options:
         selected = st.selectbox("选择个股查看详情", stock_options)
         if selected:
@@ -4,30 +4,222 @@
 军规级升级说明:
 1. 强制前复权 (qfq) 数据管道，消灭除权价格断层。
 2. 修复 Pandas 绝对索引导致的进度条内存溢出 Bug，引入游标枚举与强制边界。
-3. 引入令牌桶限流 (0.05s)，防止 Tushare 5000 积分触发熔断。
+3. 日线按 50 只一批批量拉取 (pro.daily + adj_factor 本地前复权)，批次间令牌桶限流，防止 Tushare 5000 积分触发熔断；批量接口不可用时降级为 8 线程逐只 pro_bar。
 ================================================================
 """
 import streamlit as st
 import pandas as pd
 import numpy as np
-import tushare as ts
 from datetime import datetime, timedelta
 import sys, os
 import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from itertools import islice
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_fetcher import _get_tushare_pro, _last_trade_date
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _root not in sys.path:  # 页面每次重跑都会执行, 避免 sys.path 重复累积
+    sys.path.insert(0, _root)
 
 st.set_page_config(page_title="二波雷达", page_icon="🎯", layout="wide")
 
 # ============================================================
 # 登录校验与环境安全核查
 # ============================================================
-if not st.session_state.get("authenticated"):
+st.session_state.setdefault("authenticated", False)
+if not st.session_state.authenticated:
     st.warning("请先登录")
     st.page_link("app.py", label="🔐 返回登录", icon="🏠")
     st.stop()
 
+# 登录后再导入取数模块: 未登录访问不承担 tushare 等重型依赖的导入开销
+from utils.data_fetcher import _get_tushare_pro, _last_trade_date, parallel_fetch
+from utils.pullback import detect_pullback, _MIN_BARS
+
+logger = logging.getLogger("xunxing")  # 与 utils 取数层共用同一日志器
+
+# ============================================================
+# 批量行情管道 (逐只 pro_bar → 每 50 只一次 pro.daily + adj_factor)
+# ============================================================
+_BATCH_SIZE = 50        # 50 只 × ~80 交易日 ≈ 4000 行, 低于 pro.daily 单次 6000 行上限
+_BATCH_INTERVAL = 0.3   # 批次间令牌桶间隔 (秒), 每批 2 次调用
+_PER_STOCK_RATE = 20    # 降级逐只 pro_bar 时的全局调用速率 (次/秒)
+_PRICE_COLS = ["open", "high", "low", "close"]
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_universe(today: str, target_concepts: tuple) -> pd.DataFrame:
+    """Stage 1 基本面滤网: 股票列表 × 当日估值 → 市值 + 盈利 + 行业过滤后的候选池 (失败抛 RuntimeError, 不进缓存)"""
+    pro = _get_tushare_pro()
+
+    # 股票列表与当日估值互不依赖, 并行请求 (耗时取两者最大值而非相加)
+    fetched = parallel_fetch({
+        "basic": partial(pro.stock_basic, exchange='', list_status='L', fields='ts_code,symbol,name,industry'),
+        "daily": partial(pro.daily_basic, trade_date=today, fields='ts_code,circ_mv,pe_ttm,pb'),
+    })
+
+    # 获取基础信息 (排除 ST 与 退市股)
+    df_basic = fetched["basic"]
+    if df_basic is None or df_basic.empty:
+        raise RuntimeError("无法获取基础股票列表，请检查网络或接口权限。")
+    df_basic = df_basic[~df_basic['name'].str.contains('ST|退')]
+
+    # 获取估值与市值
+    df_daily = fetched["daily"]
+    if df_daily is None or df_daily.empty:
+        # 如果今天的数据还没出，尝试获取上一个交易日的
+        df_daily = pro.daily_basic(trade_date=_last_trade_date(1), fields='ts_code,circ_mv,pe_ttm,pb')
+    if df_daily is None or df_daily.empty:
+        raise RuntimeError("估值数据获取失败，可能遭遇 Tushare 接口维护或限流。")
+
+    df_merged = pd.merge(df_basic, df_daily, on='ts_code')
+
+    # Tushare circ_mv 单位为万元。20亿 = 200,000；100亿 = 1,000,000
+    cond_mv = (df_merged['circ_mv'] >= 200000) & (df_merged['circ_mv'] <= 1000000)
+    cond_pe = (df_merged['pe_ttm'] > 0) & (df_merged['pe_ttm'] < 80) # 中线必须有基本面支撑
+    cond_ind = df_merged['industry'].isin(target_concepts)
+    return df_merged[cond_mv & cond_pe & cond_ind].reset_index(drop=True)
+
+
+class _RateLimiter:
+    """线程安全的令牌桶: 按固定间隔发放调用许可, 多线程共享同一速率上限"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _batched(codes, size: int = _BATCH_SIZE):
+    """按固定批量切分代码序列"""
+    it = iter(codes)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def _fetch_batched(pro, codes: tuple, start_date: str, end_date: str, on_batch=None) -> pd.DataFrame:
+    """主路径: 每 50 只一次 pro.daily + adj_factor, 本地换算前复权"""
+    limiter = _RateLimiter(1.0 / _BATCH_INTERVAL)
+    bars, factors = [], []
+    for done, batch in enumerate(_batched(codes), 1):
+        limiter.wait()
+        joined = ",".join(batch)
+        df_k = pro.daily(ts_code=joined, start_date=start_date, end_date=end_date,
+                         fields="ts_code,trade_date,open,high,low,close,vol")
+        if df_k is not None and not df_k.empty:
+            # 先筛后算: K 线不足的标的 (停牌过久/次新) 形态判定必然落选, 直接丢弃且不再为其拉复权因子
+            df_k = df_k[df_k.groupby("ts_code")["close"].transform("size") >= _MIN_BARS]
+        if df_k is not None and not df_k.empty:
+            bars.append(df_k)
+            survivors = df_k["ts_code"].unique()
+            factors.append(pro.adj_factor(ts_code=",".join(survivors), start_date=start_date, end_date=end_date,
+                                          fields="ts_code,trade_date,adj_factor"))
+        if on_batch:
+            on_batch(min(done * _BATCH_SIZE, len(codes)), len(codes))
+
+    if not bars:
+        return pd.DataFrame(columns=["ts_code", "trade_date", *_PRICE_COLS, "vol"])
+    df_all = pd.concat(bars, ignore_index=True)
+    factors = [f for f in factors if f is not None and not f.empty]
+    if factors:
+        df_all = df_all.merge(pd.concat(factors, ignore_index=True), on=["ts_code", "trade_date"], how="left")
+    else:
+        df_all["adj_factor"] = np.nan
+    df_all = df_all.sort_values(["ts_code", "trade_date"], ignore_index=True)
+
+    # 前复权: 价格 × 当日因子 / 区间最新因子 (与 pro_bar(adj='qfq') 口径一致, 缺因子按不复权处理)
+    adj = df_all.groupby("ts_code")["adj_factor"].ffill()
+    ratio = (adj / adj.groupby(df_all["ts_code"]).transform("last")).fillna(1.0)
+    df_all[_PRICE_COLS] = df_all[_PRICE_COLS].mul(ratio, axis=0)
+    return df_all.drop(columns="adj_factor")
+
+
+def _ascending(df_k: pd.DataFrame) -> pd.DataFrame:
+    """单只 K 线转为日期升序: pro_bar 按日期倒序返回, 翻转视图即可, 仅乱序时才真正排序"""
+    dates = df_k["trade_date"]
+    if dates.is_monotonic_increasing:
+        return df_k
+    if dates.is_monotonic_decreasing:
+        return df_k.iloc[::-1]
+    return df_k.sort_values("trade_date", kind="mergesort")
+
+
+def _fetch_per_stock(pro, codes: tuple, start_date: str, end_date: str, on_batch=None) -> pd.DataFrame:
+    """降级路径: 批量接口不可用 (积分/权限不足) 时逐只 pro_bar(qfq), 8 线程并发 + 20 次/秒令牌桶"""
+    import tushare as ts
+
+    limiter = _RateLimiter(_PER_STOCK_RATE)
+
+    def fetch_one(code):
+        limiter.wait()
+        return ts.pro_bar(ts_code=code, api=pro, adj="qfq", start_date=start_date, end_date=end_date)
+
+    bars = {}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = {pool.submit(fetch_one, code): code for code in codes}
+        for done, fut in enumerate(as_completed(futures), 1):
+            try:
+                df_k = fut.result()
+                if df_k is not None and not df_k.empty:
+                    bars[futures[fut]] = _ascending(df_k[["ts_code", "trade_date", *_PRICE_COLS, "vol"]])
+            except Exception as e:
+                # 捕获单只股票的异常，不中断全局扫描
+                logger.warning(f"[二波雷达] 跳过 {futures[fut]}: {e}")
+            if on_batch:
+                on_batch(done, len(codes))
+
+    if not bars:
+        return pd.DataFrame(columns=["ts_code", "trade_date", *_PRICE_COLS, "vol"])
+    # 单只已按日期升序, 再按代码顺序拼接即为 (ts_code, trade_date) 有序长表, 无需整表重排
+    return pd.concat([bars[code] for code in sorted(bars)], ignore_index=True)
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def fetch_qfq_bars(codes: tuple, start_date: str, end_date: str, _on_batch=None) -> pd.DataFrame:
+    """
+    拉取候选池区间前复权日线 → 按 (ts_code, trade_date) 排序的长表 (批量接口优先, 失败降级逐只并发)
+    数万行的大表用 cache_resource 共享同一对象 (免去 cache_data 每次命中的反序列化拷贝), 调用方只读不改
+    一根 K 线都没拉到时抛 RuntimeError, 不进缓存 (否则空表被缓存一小时, 重试只会得到"无命中")
+    """
+    pro = _get_tushare_pro()
+    try:
+        df_all = _fetch_batched(pro, codes, start_date, end_date, _on_batch)
+    except Exception as e:
+        logger.warning(f"[降级] 批量日线接口失败 → 逐只 pro_bar: {e}")
+        df_all = _fetch_per_stock(pro, codes, start_date, end_date, _on_batch)
+    if df_all.empty:
+        raise RuntimeError("前复权日线获取失败，可能遭遇 Tushare 接口限流或权限不足，请稍后重试。")
+    return df_all
+
+
+# 结果表: 内部字段 → 展示列名; 百分比保持数值列, 由 column_config 负责显示格式 (可按数值排序)
+_RESULT_COLUMNS = {
+    "ts_code": "股票代码",
+    "name": "名称",
+    "industry": "所属行业",
+    "circ_mv": "流通市值(亿)",
+    "pe_ttm": "PE(TTM)",
+    "surge": "首波涨幅",
+    "current_price": "当前价格",
+    "target_price": "50%支撑价",
+    "shrink_ratio": "回调缩量比",
+}
+_RESULT_FORMATS = {
+    "首波涨幅": st.column_config.NumberColumn(format="%.1f%%"),
+    "回调缩量比": st.column_config.NumberColumn(format="%.1f%%"),
+}
+
+
 st.title("🎯 寻星中线配置雷达 — 强势股二波博弈")
 st.caption("策略锚定: [流通市值 20-100亿] + [科技/AI/国资属性] + [PE>0] + [拉升>40%后缩量回调50%]")
 st.divider()
@@ -68,34 +260,12 @@ try:
     # --------------------------------------------------------
     today = _last_trade_date()
     
-    # 获取基础信息 (排除 ST 与 退市股)
-    df_basic = pro.stock_basic(exchange='', list_status='L', fields='ts_code,symbol,name,industry')
-    if df_basic is not None and not df_basic.empty:
-        df_basic = df_basic[~df_basic['name'].str.contains('ST|退')]
-    else:
-        st.error("无法获取基础股票列表，请检查网络或接口权限。")
+    # 股票列表与估值每日才变, 按 (交易日, 行业组合) 缓存: 调整滑块重跑时跳过这两次大包请求
+    try:
+        df_universe = load_universe(today, tuple(target_concepts))
+    except RuntimeError as e:
+        st.error(str(e))
         st.stop()
-    
-    # 获取估值与市值
-    df_daily = pro.daily_basic(trade_date=today, fields='ts_code,circ_mv,pe_ttm,pb')
-    if df_daily is None or df_daily.empty:
-        # 如果今天的数据还没出，尝试获取上一个交易日的
-        df_daily = pro.daily_basic(trade_date=_last_trade_date(1), fields='ts_code,circ_mv,pe_ttm,pb')
-
-    if df_daily is None or df_daily.empty:
-        st.error("估值数据获取失败，可能遭遇 Tushare 接口维护或限流。")
-        st.stop()
-
-    progress.progress(20, "Stage 1/3: 执行矩阵交集过滤 (市值+盈利+行业)...")
-    
-    df_merged = pd.merge(df_basic, df_daily, on='ts_code')
-    
-    # Tushare circ_mv 单位为万元。20亿 = 200,000；100亿 = 1,000,000
-    cond_mv = (df_merged['circ_mv'] >= 200000) & (df_merged['circ_mv'] <= 1000000)
-    cond_pe = (df_merged['pe_ttm'] > 0) & (df_merged['pe_ttm'] < 80) # 中线必须有基本面支撑
-    cond_ind = df_merged['industry'].isin(target_concepts)
-    
-    df_universe = df_merged[cond_mv & cond_pe & cond_ind].copy()
     total_candidates = len(df_universe)
     
     progress.progress(40, f"Stage 2/3: 基本面过滤完毕，剩余 {total_candidates} 只标的。准备进入形态识别引擎...")
@@ -111,96 +281,45 @@ try:
     # 计算时间窗口：过去约 80 个交易日 (对应自然日120天)
     end_date = datetime.now().strftime('%Y%m%d')
     start_date = (datetime.now() - timedelta(days=120)).strftime('%Y%m%d') 
-    
-    signals = []
-    
-    # 【架构师核心修复】: 使用 enumerate 获取枚举游标 i，而非 DataFrame 的原始绝对索引 idx
-    for i, (orig_idx, row) in enumerate(df_universe.iterrows()):
-        ts_code = row['ts_code']
-        name = row['name']
-        
+
+    # 【架构师底线】：必须使用前复权价格；整个候选池按批次拉取，网络往返从 N 次降为 N/50 批
+    def _on_batch(done, total):
         # 精确的进度条步进控制与极值熔断 (确保不会超出 100)
-        current_prog = 40 + int(60 * (i / total_candidates))
-        current_prog = min(current_prog, 100)
-        progress.progress(current_prog, f"Stage 3/3: 正在核算量价形态 - {name} ({i+1}/{total_candidates})")
-        
-        try:
-            # 【架构师底线】：必须强制使用前复权 pro_bar，加入 50ms 令牌桶休眠
-            time.sleep(0.05) 
-            df_k = ts.pro_bar(ts_code=ts_code, api=pro, adj='qfq', start_date=start_date, end_date=end_date)
-            
-            # 数据容错：停牌过久或新股导致 K线过短
-            if df_k is None or len(df_k) < 40:
-                continue
-                
-            df_k = df_k.sort_values('trade_date').reset_index(drop=True)
-            
-            # --- 寻星核心形态算法 (A 杀 / N 字形判定) ---
-            
-            # A. 寻找拉升浪的峰值 (Peak) 和 谷值 (Base)
-            search_window = df_k.iloc[:-5] # 留出最近5天作为回调验证期，防止假突破
-            peak_idx = search_window['high'].idxmax()
-            peak_price = search_window.loc[peak_idx, 'high']
-            
-            # 如果波峰出现在太久之前（比如60个交易日前），判定为过气题材，忽略
-            if len(df_k) - peak_idx > 30:
-                continue
-                
-            base_window = search_window.iloc[:peak_idx]
-            if len(base_window) < 5: continue
-            base_idx = base_window['low'].idxmin()
-            base_price = base_window.loc[base_idx, 'low']
-            
-            # B. 验证拉升幅度
-            surge = (peak_price - base_price) / base_price
-            if surge < (surge_threshold / 100):
-                continue
-                
-            # C. 验证 50% 黄金坑深度
-            current_price = df_k.iloc[-1]['close']
-            target_price = peak_price - (peak_price - base_price) * 0.5
-            tolerance = target_price * 0.12 # 允许支撑位上下 12% 的误差宽幅
-            
-            if not (target_price - tolerance <= current_price <= target_price + tolerance):
-                continue
-                
-            # D. 致命校验：缩量断层 (主力是否出逃)
-            impulse_vol = df_k.iloc[base_idx:peak_idx+1]['vol'].mean()
-            pullback_vol = df_k.iloc[peak_idx+1:]['vol'].mean()
-            
-            shrink_ratio = pullback_vol / impulse_vol
-            if shrink_ratio > (vol_shrink / 100):
-                continue # 放量下跌，大概率是资金抛售(A杀)，直接舍弃
-                
-            # 符合所有严苛条件，装载到极光信号池
-            signals.append({
-                "股票代码": ts_code,
-                "名称": name,
-                "所属行业": row['industry'],
-                "流通市值(亿)": round(row['circ_mv'] / 10000, 1),
-                "PE(TTM)": round(row['pe_ttm'], 1),
-                "首波涨幅": f"{surge*100:.1f}%",
-                "当前价格": current_price,
-                "50%支撑价": round(target_price, 2),
-                "回调缩量比": f"{shrink_ratio*100:.1f}%"
-            })
-            
-        except Exception as e:
-            # 捕获单只股票的异常，不中断全局扫描
-            print(f"Skipping {ts_code} due to error: {str(e)}")
-            continue
+        progress.progress(min(40 + int(40 * done / total), 100),
+                          f"Stage 2/3: 批量拉取前复权日线 ({done}/{total})")
+
+    try:
+        df_all = fetch_qfq_bars(tuple(df_universe['ts_code']), start_date, end_date, _on_batch=_on_batch)
+    except RuntimeError as e:
+        st.error(str(e))
+        st.stop()
+    progress.progress(80, f"Stage 3/3: 正在核算 {total_candidates} 只标的的量价形态...")
+    hits = detect_pullback(df_all, surge_threshold / 100, vol_shrink / 100)
+
+    # 符合所有严苛条件，装载到极光信号池: 一次 merge + assign 成表 (inner merge 保持候选池原有顺序)
+    df_result = (
+        df_universe.merge(hits, on='ts_code')
+        .assign(
+            circ_mv=lambda d: (d['circ_mv'] / 10000).round(1),
+            pe_ttm=lambda d: d['pe_ttm'].round(1),
+            surge=lambda d: d['surge'] * 100,
+            target_price=lambda d: d['target_price'].round(2),
+            shrink_ratio=lambda d: d['shrink_ratio'] * 100,
+        )
+        [list(_RESULT_COLUMNS)]
+        .rename(columns=_RESULT_COLUMNS)
+    )
 
     progress.progress(100, "✅ 寻星雷达扫描完成！")
     
     # --------------------------------------------------------
     # Stage 3: 结果渲染与系统输出
     # --------------------------------------------------------
-    if not signals:
+    if df_result.empty:
         st.warning("⚠️ 扫描结束。今日全市场无一只股票符合 [基本面安全垫 + 极度缩量回调] 的双重严苛过滤。请保持耐心空仓。")
     else:
-        df_result = pd.DataFrame(signals)
         st.success(f"🎯 狩猎成功：在 {total_candidates} 只基本面标的中，精准锁定 {len(df_result)} 只极光标的！")
-        st.dataframe(df_result, use_container_width=True)
+        st.dataframe(df_result, use_container_width=True, column_config=_RESULT_FORMATS)
         
         # 投资纪律声明
         st.markdown("""
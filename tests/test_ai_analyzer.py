@@ -0,0 +1,31 @@
+"""utils.ai_analyzer 回复解析测试"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ai_analyzer import _parse_json
+
+_OBJ = '{"id": 1, "category": "行业", "sectors": ["半导体", "AI"]}'
+_ITEM = {"id": 1, "category": "行业", "sectors": ["半导体", "AI"]}
+
+
+def test_single_object_reply_is_wrapped():
+    assert _parse_json(_OBJ) == [_ITEM]
+
+
+def test_fenced_object_with_inner_list_is_not_mistaken_for_array():
+    assert _parse_json(f"```json\n{_OBJ}\n```") == [_ITEM]
+
+
+def test_array_with_trailing_text_and_comma():
+    assert _parse_json(f"[{_OBJ},]\n以上为分析结果") == [_ITEM]
+
+
+def test_truncated_array_recovers_complete_items():
+    assert _parse_json(f'[{_OBJ}, {{"id": 2, "sec') == [_ITEM]
+
+
+def test_failed_call_and_truncated_object():
+    assert _parse_json("[AI调用失败: timeout]") is None
+    assert _parse_json('{"id": 1, "sectors": ["半导体"') is None
@@ -9,35 +9,85 @@ V4 升级:
 ================================================================
 """
 import json
+import os
 import re
+import time
+import hashlib
 import logging
+import concurrent.futures
 import streamlit as st
 from datetime import datetime
 
+from utils.config import _secrets
+
 logger = logging.getLogger("xunxing")
 
+# JSON 解析: orjson > ujson > 标准库 (可选依赖, 未安装时自动降级)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        _json_loads = ujson.loads
+    except ImportError:
+        _json_loads = json.loads
+
+# 关键词匹配: pyahocorasick 多模式自动机 (可选依赖, 未安装时逐词 in 扫描)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 
 # ============================================================
 # API 基础
 # ============================================================
 def _get_api_key() -> str:
-    try:
-        key = st.secrets.get("DEEPSEEK_API_KEY", "")
-        if key and not key.startswith("sk-xxxx"):
-            return key
-    except Exception:
-        pass
+    key = _secrets()["DEEPSEEK_API_KEY"]
+    if key and not key.startswith("sk-xxxx"):
+        return key
     return ""
 
 
-def _call_deepseek(prompt: str, system: str = "", temperature: float = 0.3,
-                   max_tokens: int = 4000) -> str:
+# 单次请求超时 (秒): 非流式长报告 (4000 tokens) 生成约需 1-2 分钟, 留足余量
+_AI_TIMEOUT = 180.0
+
+
+@st.cache_resource
+def _deepseek_client(api_key: str):
+    """按 API Key 缓存 DeepSeek 客户端 (跨会话复用 HTTP 连接池; 更换 Key 后自动新建)"""
+    from openai import OpenAI
+    # 有界超时 + 有限重试: 连接挂死时快速失败, 而不是无限期卡住页面
+    return OpenAI(api_key=api_key, base_url="https://api.deepseek.com",
+                  timeout=_AI_TIMEOUT, max_retries=2)
+
+
+def _get_deepseek_client():
+    """获取 DeepSeek 客户端 (未配置 Key 不缓存 None, 补配后无需重启即可生效)"""
     api_key = _get_api_key()
     if not api_key:
+        return None
+    try:
+        return _deepseek_client(api_key)
+    except ImportError:
+        logger.error("openai 未安装")
+        return None
+
+
+def _call_deepseek(prompt: str, system: str = "", temperature: float = 0.3,
+                   max_tokens: int = 4000, timeout: float = None, cache: bool = True) -> str:
+    """同步调用 DeepSeek; cache=True 时相同 (system, prompt, 参数) 的成功回复落盘复用 1 小时"""
+    client = _get_deepseek_client()
+    if not client:
         return ""
+    digest = _prompt_digest(prompt, system, temperature, max_tokens) if cache else None
+    if digest:
+        cached = _disk_get("llm", digest, ttl=_LLM_CACHE_TTL)
+        if cached is not None:
+            return cached
+    start = time.perf_counter()
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key, base_url="https://api.deepseek.com")
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
@@ -47,11 +97,106 @@ def _call_deepseek(prompt: str, system: str = "", temperature: float = 0.3,
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
+            timeout=timeout or _AI_TIMEOUT,
         )
-        return response.choices[0].message.content.strip()
+        logger.info(f"DeepSeek 调用耗时 {time.perf_counter() - start:.1f}s (max_tokens={max_tokens})")
+        result = response.choices[0].message.content.strip()
     except Exception as e:
-        logger.error(f"DeepSeek API 调用失败: {e}")
+        logger.error(f"DeepSeek API 调用失败 ({time.perf_counter() - start:.1f}s): {e}")
         return f"[AI调用失败: {e}]"
+    if digest and result:
+        _disk_put("llm", digest, result)
+    return result
+
+
+def _stream_deepseek(prompt: str, system: str = "", temperature: float = 0.3,
+                     max_tokens: int = 4000):
+    """流式调用 DeepSeek, 逐段 yield 文本 (失败时 yield 错误说明)"""
+    client = _get_deepseek_client()
+    if not client:
+        return
+    try:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        stream = client.chat.completions.create(
+            model="deepseek-chat",
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            timeout=_AI_TIMEOUT,
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        logger.error(f"DeepSeek API 流式调用失败: {e}")
+        yield f"[AI调用失败: {e}]"
+
+
+# ============================================================
+# AI 结果缓存: 内存 (st.cache_data) + 磁盘 (data/ai_cache, 重启后仍可命中)
+# ============================================================
+_AI_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ai_cache")
+_AI_CACHE_TTL = 86400
+_LLM_CACHE_TTL = 3600        # 通用 LLM 调用层: 相同 prompt 一小时内直接复用
+_AI_CACHE_MAX_FILES = 500    # 磁盘缓存文件上限, 超出按修改时间淘汰
+
+
+def _news_digest(news_list: list) -> str:
+    """资讯列表内容摘要 (按 时间+标题), 作为缓存键代替整表哈希"""
+    payload = json.dumps([(n.get("time", ""), n.get("title", "")) for n in news_list], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _ai_failed(text: str) -> bool:
+    return not text or text.startswith("[AI调用失败")
+
+
+def _prompt_digest(prompt: str, system: str, temperature: float, max_tokens: int) -> str:
+    """LLM 调用缓存键: system + prompt + 采样参数"""
+    payload = "\x00".join((system, prompt, str(temperature), str(max_tokens))).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _disk_get(kind: str, digest: str, ttl: float = _AI_CACHE_TTL):
+    path = os.path.join(_AI_CACHE_DIR, f"{kind}_{digest}.json")
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return _json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _disk_put(kind: str, digest: str, value):
+    path = os.path.join(_AI_CACHE_DIR, f"{kind}_{digest}.json")
+    try:
+        os.makedirs(_AI_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        _disk_trim()
+    except OSError as e:
+        logger.warning(f"AI 缓存写入失败: {e}")
+
+
+def _disk_trim(keep: int = _AI_CACHE_MAX_FILES):
+    """缓存目录超过上限时按修改时间淘汰最旧的文件"""
+    with os.scandir(_AI_CACHE_DIR) as it:
+        entries = [e for e in it if e.name.endswith(".json")]
+    if len(entries) <= keep:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for e in entries[:len(entries) - keep]:
+        try:
+            os.remove(e.path)
+        except OSError:
+            pass
 
 
 # ============================================================
@@ -110,28 +255,35 @@ FOF_CIO_SYSTEM = """你是「寻星资产配置公司」的首席投资官（CIO
 # ============================================================
 # 1. 资讯批量分析
 # ============================================================
-def analyze_news_batch(news_list: list) -> list:
-    if not news_list:
-        return []
-    api_key = _get_api_key()
-    if not api_key:
-        return _keyword_analysis(news_list)
-
-    results = []
-    batch_size = 15
-
-    for i in range(0, len(news_list), batch_size):
-        batch = news_list[i:i + batch_size]
-        batch_text = ""
-        for idx, item in enumerate(batch):
-            title = item.get("title", "")
-            content = item.get("content", "")[:80]
-            src = item.get("source", "")
-            batch_text += f"\n[{idx+1}] [{src}] {title}"
-            if content and content != title:
-                batch_text += f" | {content}"
-
-        prompt = f"""分析以下{len(batch)}条财经资讯，返回JSON数组。
+_NEWS_BATCH_SIZE = 50           # 单次请求打包条数: 大批摊薄每次往返与 system prompt 开销
+_NEWS_TOKENS_PER_ITEM = 80      # 每条 JSON 结果约 60-80 tokens, 按批大小估算 max_tokens
+_NEWS_MAX_TOKENS = 8000         # DeepSeek 单次输出上限
+
+
+def _ai_max_concurrency() -> int:
+    """DeepSeek 并发上限 (secrets 中 AI_MAX_CONCURRENCY 可覆盖, 非法值回落默认 8)"""
+    try:
+        return max(1, int(_secrets()["AI_MAX_CONCURRENCY"]))
+    except (TypeError, ValueError):
+        return 8
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _batch_analysis(digest: str, _batch: list) -> list:
+    """单批 (≤50 条) 结构化分析, 返回与批次对齐的分析结果 (按批内容摘要缓存, 解析失败抛错不入缓存)"""
+    cached = _disk_get("batch", digest)
+    if cached is not None:
+        return cached
+
+    lines = []
+    for idx, item in enumerate(_batch, 1):
+        title = item.get("title", "")
+        content = item.get("content", "")[:80]
+        line = f"\n[{idx}] [{item.get('source', '')}] {title}"
+        lines.append(f"{line} | {content}" if content and content != title else line)
+    batch_text = "".join(lines)
+
+    prompt = f"""分析以下{len(_batch)}条财经资讯，返回JSON数组。
 每条: id(序号), category(宏观/行业/公司/海外/政策), sentiment(-1到1), impact(1-5), sectors(相关行业数组), summary(15字摘要)
 
 资讯:
@@ -139,37 +291,94 @@ def analyze_news_batch(news_list: list) -> list:
 
 直接返回JSON数组，不要其他文字:"""
 
-        resp = _call_deepseek(prompt, "你是A股金融分析师，只返回JSON",
-                              temperature=0.1, max_tokens=2500)
-        parsed = _parse_json(resp)
-        if parsed:
-            for item_data in parsed:
-                idx = item_data.get("id", 0) - 1
-                if 0 <= idx < len(batch):
-                    batch[idx]["analysis"] = item_data
-            results.extend(batch)
+    # 流式接收: 输出被截断或中途断流时, 已完整输出的条目仍可由 _parse_json 逐个恢复
+    max_tokens = min(_NEWS_MAX_TOKENS, _NEWS_TOKENS_PER_ITEM * len(_batch) + 200)
+    resp = "".join(_stream_deepseek(prompt, "你是A股金融分析师，只返回JSON",
+                                    temperature=0.1, max_tokens=max_tokens))
+    if _ai_failed(resp):
+        raise RuntimeError(resp or "[AI调用失败: 空响应]")
+    parsed = _parse_json(resp)
+    if not parsed:
+        raise ValueError("AI 批量分析结果解析失败")
+    analyses = [None] * len(_batch)
+    for item_data in parsed:
+        idx = item_data.get("id", 0) - 1 if isinstance(item_data, dict) else -1
+        if 0 <= idx < len(_batch):
+            analyses[idx] = item_data
+    if None not in analyses:  # 残缺结果不落盘, 下次启动重新请求
+        _disk_put("batch", digest, analyses)
+    return analyses
+
+
+def _analyze_batch(batch: list, retry: bool = True):
+    """单批资讯结构化分析, 原地写入 item["analysis"]
+
+    调用本身失败 (网络/鉴权/超时) 直接降级关键词分析; 整批解析失败且允许重试时返回 None,
+    由调度方对半拆分重试一次; 部分缺失就地补发一次, 仍缺失的降级关键词分析。
+    """
+    try:
+        analyses = _batch_analysis(_news_digest(batch), batch)
+    except RuntimeError:
+        return _keyword_analysis(batch)
+    except ValueError:
+        return None if retry and len(batch) > 1 else _keyword_analysis(batch)
+    missing = []
+    for item, analysis in zip(batch, analyses):
+        if analysis is not None:
+            item["analysis"] = analysis
+        else:
+            missing.append(item)
+    # 部分恢复: 条目为同一 dict, 原地补全, 顺序不变
+    if missing:
+        if retry and len(missing) < len(batch):
+            _analyze_batch(missing, retry=False)
         else:
-            results.extend(_keyword_analysis(batch))
+            _keyword_analysis(missing)
+    return batch
 
-    return results
+
+def analyze_news_stream(news_list: list):
+    """并行分批分析, 每完成一批即 yield (批起始下标, 该批结果), 完成顺序不固定"""
+    if not news_list:
+        return
+    if not _get_api_key():
+        yield 0, _keyword_analysis(news_list)
+        return
+
+    _get_deepseek_client()  # 主线程先建好客户端, 工作线程直接命中缓存
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_ai_max_concurrency()) as executor:
+        def submit(start, batch, retry=True):
+            return executor.submit(_analyze_batch, batch, retry), (start, batch)
+
+        pending = dict(submit(i, news_list[i:i + _NEWS_BATCH_SIZE])
+                       for i in range(0, len(news_list), _NEWS_BATCH_SIZE))
+        while pending:
+            finished, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                start, batch = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    # 整批解析失败 (多为输出截断): 对半拆分重新入池, 只拆一次, 两半再失败即降级关键词分析
+                    logger.warning(f"批量分析解析失败, 拆半重试 {len(batch)} 条")
+                    mid = len(batch) // 2
+                    pending.update((submit(start, batch[:mid], False), submit(start + mid, batch[mid:], False)))
+                else:
+                    yield start, result
 
 
 # ============================================================
 # 2. 核心主线提炼
 # ============================================================
-def summarize_market_threads(news_list: list) -> str:
-    api_key = _get_api_key()
-    if not api_key or not news_list:
-        return "⚠️ 未配置 API 密钥或无资讯数据。"
+_THREADS_SYSTEM = """你是寻星资产配置公司的 CIO。从碎片化资讯中提炼当前市场最具爆发力的投资主线。
+绝不流水账罗列新闻，必须寻找群体性、行业性或宏观级别的事件共振。"""
 
-    text_blocks = [f"- [{n.get('source','')}] {n.get('title','')} {n.get('content','')[:60]}"
-                   for n in news_list]
-    news_text = "\n".join(text_blocks[:80])
 
-    system = """你是寻星资产配置公司的 CIO。从碎片化资讯中提炼当前市场最具爆发力的投资主线。
-绝不流水账罗列新闻，必须寻找群体性、行业性或宏观级别的事件共振。"""
+def _threads_prompt(news_list: list) -> str:
+    # 只格式化实际入 prompt 的前 80 条
+    news_text = "\n".join(f"- [{n.get('source','')}] {n.get('title','')} {n.get('content','')[:60]}"
+                          for n in news_list[:80])
 
-    prompt = f"""基于以下 {len(news_list)} 条市场资讯，提炼当前最核心的 3 条投资主线。
+    return f"""基于以下 {len(news_list)} 条市场资讯，提炼当前最核心的 3 条投资主线。
 
 【格式要求】
 ### 🔥 市场核心主线提炼
@@ -180,7 +389,27 @@ def summarize_market_threads(news_list: list) -> str:
 
 【输入资讯】
 {news_text}"""
-    return _call_deepseek(prompt, system, temperature=0.3, max_tokens=2500)
+
+
+def summarize_market_threads_stream(news_list: list):
+    """主线提炼 (流式): 命中缓存整段返回, 否则边生成边 yield, 完整成功后写入缓存"""
+    if not _get_api_key() or not news_list:
+        yield "⚠️ 未配置 API 密钥或无资讯数据。"
+        return
+
+    digest = _news_digest(news_list)
+    cached = _disk_get("threads", digest)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    for chunk in _stream_deepseek(_threads_prompt(news_list), _THREADS_SYSTEM, temperature=0.3, max_tokens=2500):
+        parts.append(chunk)
+        yield chunk
+    result = "".join(parts).strip()
+    if not _ai_failed(result):
+        _disk_put("threads", digest, result)
 
 
 # ============================================================
@@ -193,8 +422,26 @@ def generate_daily_report(market_text: str, news_text: str) -> str:
         return "⚠️ 未配置 API Key。"
 
     today_str = datetime.now().strftime('%Y年%m月%d日')
+    payload = "\x00".join((today_str, market_text, news_text)).encode("utf-8")
+    digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    try:
+        return _daily_report(digest, today_str, market_text, news_text)
+    except RuntimeError as e:
+        return str(e)
+
 
-    prompt = f"""基于以下**全量客观数据**，生成 {today_str} 寻星 FOF CIO 日度配置报告。
+@st.cache_data(ttl=1800, show_spinner=False)
+def _daily_report(digest: str, today_str: str, _market_text: str, _news_text: str) -> str:
+    """日报生成 (按 日期+输入文本 摘要缓存 30 分钟: 数据未变时重复点击不再调用 API; 失败抛错不缓存)"""
+    result = _call_deepseek(_report_prompt(today_str, _market_text, _news_text), FOF_CIO_SYSTEM,
+                            temperature=0.3, max_tokens=6000)
+    if _ai_failed(result):
+        raise RuntimeError(result or "[AI调用失败: 空响应]")
+    return result
+
+
+def _report_prompt(today_str: str, market_text: str, news_text: str) -> str:
+    return f"""基于以下**全量客观数据**，生成 {today_str} 寻星 FOF CIO 日度配置报告。
 
 【重要纪律】
 1. 每个结论必须引用输入数据中的具体数值佐证
@@ -276,8 +523,6 @@ def generate_daily_report(market_text: str, news_text: str) -> str:
 ---
 ⚠️ 免责: 本报告由AI基于公开数据生成，仅供内部研究参考，不构成投资建议。市场有风险，投资需谨慎。"""
 
-    return _call_deepseek(prompt, FOF_CIO_SYSTEM, temperature=0.3, max_tokens=6000)
-
 
 # ============================================================
 # 4. 单条深度分析
@@ -302,63 +547,112 @@ def analyze_single_news(text: str) -> str:
 # ============================================================
 # 辅助函数
 # ============================================================
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+_JSON_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$')
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+
+
 def _parse_json(text: str):
+    """AI 回复 → JSON 列表: 去掉 Markdown 代码围栏后整体解析 (单个对象包成 [obj]);
+    以 '[' 开头才用正则截取数组 (忽略数组后的多余文字), 失败再去尾逗号重试一次, 仍失败则恢复已完整的元素"""
     if not text or text.startswith("[AI调用失败"):
         return None
-    text = text.strip()
-    text = re.sub(r'^```(?:json)?\s*', '', text)
-    text = re.sub(r'\s*```$', '', text)
-    text = text.strip()
-    try:
-        r = json.loads(text)
-        return r if isinstance(r, list) else [r]
-    except Exception:
-        pass
-    match = re.search(r'\[.*\]', text, re.DOTALL)
-    if match:
+    payload = _JSON_FENCE_RE.sub("", text.strip())
+    candidates = [payload]
+    if payload.startswith("["):
+        match = _JSON_ARRAY_RE.search(payload)
+        if match and match.group() != payload:
+            candidates.append(match.group())
+    for candidate in (*candidates, *(_TRAILING_COMMA_RE.sub(r'\1', c) for c in candidates)):
         try:
-            return json.loads(match.group())
+            r = _json_loads(candidate)
+            return r if isinstance(r, list) else [r]
         except Exception:
-            pass
-    try:
-        cleaned = re.sub(r',\s*([}\]])', r'\1', text)
-        match2 = re.search(r'\[.*\]', cleaned, re.DOTALL)
-        if match2:
-            return json.loads(match2.group())
-    except Exception:
-        pass
-    return None
+            continue
+    # 单个对象 (如截断的单条回复) 不做数组恢复: 否则会把对象内嵌的列表 (sectors 等) 误当作结果
+    if payload.startswith("{"):
+        return None
+    return _partial_json_items(payload) or None
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _partial_json_items(text: str) -> list:
+    """截断 / 中途断流的 JSON 数组: 从 '[' 起逐个解码已完整输出的元素, 遇到残缺元素即停止"""
+    pos = text.find("[") + 1
+    if not pos:
+        return []
+    items, n = [], len(text)
+    while pos < n:
+        while pos < n and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= n or text[pos] == "]":
+            break
+        try:
+            obj, pos = _JSON_DECODER.raw_decode(text, pos)
+        except ValueError:
+            break
+        items.append(obj)
+    return items
+
+
+# 关键词降级分析词表 (模块级常量, 自动机只在导入时构建一次)
+_POS_WORDS = frozenset(["利好", "上涨", "增长", "突破", "超预期", "创新高", "支持", "扩大", "回暖", "加速"])
+_NEG_WORDS = frozenset(["利空", "下跌", "下降", "低于预期", "收缩", "暴跌", "收紧", "风险", "减持", "违约"])
+_CAT_MAP = {
+    "宏观": frozenset(["GDP", "CPI", "PPI", "PMI", "央行", "降准", "降息", "利率", "MLF", "社融", "两会", "国务院"]),
+    "海外": frozenset(["美联储", "美国", "欧洲", "美股", "美债", "美元", "关税", "日本", "英国"]),
+    "政策": frozenset(["工信部", "发改委", "证监会", "国务院", "政策", "规划", "监管", "财政部", "银保监"]),
+    "行业": frozenset(["半导体", "芯片", "AI", "人工智能", "机器人", "新能源", "医药", "军工", "汽车", "光伏"]),
+}
+_SEC_MAP = {
+    "半导体": frozenset(["半导体", "芯片", "晶圆", "光刻", "EDA"]),
+    "AI": frozenset(["AI", "人工智能", "大模型", "算力", "机器人", "GPU"]),
+    "新能源": frozenset(["新能源", "光伏", "锂电", "储能", "风电", "碳中和"]),
+    "医药": frozenset(["医药", "创新药", "GLP", "医疗", "CXO"]),
+    "消费": frozenset(["消费", "白酒", "食品", "旅游", "免税", "家电"]),
+    "金融": frozenset(["银行", "券商", "保险", "金融", "信托"]),
+    "军工": frozenset(["军工", "国防", "航空", "航天", "导弹"]),
+}
+_ALL_KEYWORDS = _POS_WORDS.union(_NEG_WORDS, *_CAT_MAP.values(), *_SEC_MAP.values())
+
+
+def _build_keyword_automaton():
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in _ALL_KEYWORDS:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_keyword_regex() -> re.Pattern:
+    """无自动机时的降级: 单个预编译正则 (零宽前瞻在每个位置取词, 可命中重叠关键词; 长词优先)
+    先用首字字符类快速跳过不可能起词的位置, 资讯正文中关键词稀疏, 绝大多数位置一次判定即跳过"""
+    words = sorted(_ALL_KEYWORDS, key=len, reverse=True)
+    first_chars = "".join(sorted({re.escape(w[0]) for w in words}))
+    return re.compile(f"(?=[{first_chars}])(?=({'|'.join(map(re.escape, words))}))")
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+_KEYWORD_RE = _build_keyword_regex()
+
+
+def _matched_keywords(text: str) -> set:
+    """文本命中的全部关键词 (自动机 / 预编译正则单次扫描, 含重叠命中)"""
+    if _KEYWORD_AUTOMATON is not None:
+        return {word for _, word in _KEYWORD_AUTOMATON.iter(text)}
+    return set(_KEYWORD_RE.findall(text))
 
 
 def _keyword_analysis(news_list: list) -> list:
-    pos_words = ["利好", "上涨", "增长", "突破", "超预期", "创新高", "支持", "扩大", "回暖", "加速"]
-    neg_words = ["利空", "下跌", "下降", "低于预期", "收缩", "暴跌", "收紧", "风险", "减持", "违约"]
-    cat_map = {
-        "宏观": ["GDP", "CPI", "PPI", "PMI", "央行", "降准", "降息", "利率", "MLF", "社融", "两会", "国务院"],
-        "海外": ["美联储", "美国", "欧洲", "美股", "美债", "美元", "关税", "日本", "英国"],
-        "政策": ["工信部", "发改委", "证监会", "国务院", "政策", "规划", "监管", "财政部", "银保监"],
-        "行业": ["半导体", "芯片", "AI", "人工智能", "机器人", "新能源", "医药", "军工", "汽车", "光伏"],
-    }
-    sec_map = {
-        "半导体": ["半导体", "芯片", "晶圆", "光刻", "EDA"],
-        "AI": ["AI", "人工智能", "大模型", "算力", "机器人", "GPU"],
-        "新能源": ["新能源", "光伏", "锂电", "储能", "风电", "碳中和"],
-        "医药": ["医药", "创新药", "GLP", "医疗", "CXO"],
-        "消费": ["消费", "白酒", "食品", "旅游", "免税", "家电"],
-        "金融": ["银行", "券商", "保险", "金融", "信托"],
-        "军工": ["军工", "国防", "航空", "航天", "导弹"],
-    }
     for item in news_list:
-        text = item.get("title", "") + item.get("content", "")
-        category = "公司"
-        for cat, kws in cat_map.items():
-            if any(k in text for k in kws):
-                category = cat
-                break
-        pos = sum(1 for w in pos_words if w in text)
-        neg = sum(1 for w in neg_words if w in text)
-        sentiment = round(min(max((pos - neg) * 0.25, -1), 1), 2)
-        sectors = [s for s, kws in sec_map.items() if any(k in text for k in kws)]
+        hits = _matched_keywords(item.get("title", "") + item.get("content", ""))
+        category = next((cat for cat, kws in _CAT_MAP.items() if hits & kws), "公司")
+        sentiment = round(min(max((len(hits & _POS_WORDS) - len(hits & _NEG_WORDS)) * 0.25, -1), 1), 2)
+        sectors = [s for s, kws in _SEC_MAP.items() if hits & kws]
         item["analysis"] = {
             "category": category,
             "sentiment": sentiment,
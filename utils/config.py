@@ -0,0 +1,54 @@
+"""
+配置模块 - 寻星情报中心
+================================================================
+st.secrets 统一读取入口: 进程内只解析一次，各页面/模块共享
+================================================================
+"""
+import hashlib
+import hmac
+import streamlit as st
+
+_SECRET_DEFAULTS = {
+    "DEEPSEEK_API_KEY": "",
+    "TUSHARE_TOKEN": "",
+    "LOGIN_USER": "admin",
+    "LOGIN_PASS": "281699",
+    "LOGIN_PASS_SHA256": "",  # 可选: 只配置密码的 SHA-256 十六进制摘要, 优先于 LOGIN_PASS
+    "AI_MAX_CONCURRENCY": 8,  # 可选: DeepSeek 并发请求上限, 按账户 RPM 调整
+}
+
+
+@st.cache_resource
+def _secrets() -> dict:
+    """读取全部密钥 (全局缓存, 运行期间密钥不变)"""
+    values = dict(_SECRET_DEFAULTS)
+    try:
+        for key, default in _SECRET_DEFAULTS.items():
+            values[key] = st.secrets.get(key, default)
+    except Exception:
+        pass
+    return values
+
+
+def _sha256(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+@st.cache_resource
+def _login_digests() -> tuple:
+    """登录账号/密码的 SHA-256 摘要 (全局缓存, 进程内只计算一次)"""
+    secrets = _secrets()
+    pass_hex = secrets["LOGIN_PASS_SHA256"].strip().lower()
+    try:
+        pass_digest = bytes.fromhex(pass_hex) if pass_hex else _sha256(secrets["LOGIN_PASS"])
+    except ValueError:
+        pass_digest = _sha256(secrets["LOGIN_PASS"])
+    return _sha256(secrets["LOGIN_USER"]), pass_digest
+
+
+def _verify_login(username: str, password: str) -> bool:
+    """常量时间比对摘要 (避免字符串 == 提前退出泄露时序)"""
+    user_digest, pass_digest = _login_digests()
+    user_ok = hmac.compare_digest(_sha256(username), user_digest)
+    pass_ok = hmac.compare_digest(_sha256(password), pass_digest)
+    return user_ok and pass_ok
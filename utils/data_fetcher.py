@@ -26,17 +26,30 @@
 import pandas as pd
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
+import re
 import logging
 import concurrent.futures
+import functools
 from datetime import datetime, timedelta
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 import urllib3
 import certifi
 import shutil
+import threading
 import time
-import tushare as ts
+
+from utils.config import _secrets
+
+# 资讯关键词匹配: pyahocorasick 多模式自动机 (可选依赖, 未安装时用预编译正则)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # ============================================================
 # 基础设施
@@ -45,10 +58,22 @@ logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s", date
 logger = logging.getLogger("xunxing")
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+def _ensure_cert_bundle() -> str:
+    """curl 系底层读不了含非 ASCII 字符 (如中文用户名) 的证书路径: 仅此时复制一份到工作目录
+
+    已有副本且大小与源文件一致时不再复制 (certifi 升级后大小变化会触发重新复制)。
+    """
+    src = certifi.where()
+    if src.isascii():
+        return src
+    dst = os.path.join(os.getcwd(), "cacert.pem")
+    if not os.path.exists(dst) or os.path.getsize(dst) != os.path.getsize(src):
+        shutil.copy(src, dst)
+    return dst
+
+
 try:
-    safe_cert_path = os.path.join(os.getcwd(), "cacert.pem")
-    if not os.path.exists(safe_cert_path):
-        shutil.copy(certifi.where(), safe_cert_path)
+    safe_cert_path = _ensure_cert_bundle()
     os.environ["CURL_CA_BUNDLE"] = safe_cert_path
     os.environ["REQUESTS_CA_BUNDLE"] = safe_cert_path
 except Exception as e:
@@ -58,12 +83,84 @@ DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__
 os.makedirs(DATA_DIR, exist_ok=True)
 
 
+def _load_last_good(name: str):
+    """读取 DATA_DIR 下最近一次成功的取数结果 (数据源全部失败时兜底展示旧值)"""
+    try:
+        with open(os.path.join(DATA_DIR, f"{name}_last.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_last_good(name: str, value):
+    path = os.path.join(DATA_DIR, f"{name}_last.json")
+    try:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)  # 原子替换, 并发读到的总是完整文件
+    except OSError as e:
+        logger.warning(f"[兜底缓存写入失败] {name}: {e}")
+
+
+@st.cache_resource
+def _http_session() -> requests.Session:
+    """进程级共享 HTTP 会话: 连接池复用 TCP/TLS, 缓存未命中时省去每次握手"""
+    session = requests.Session()
+    # 限流/网关错误也按退避重试; 重试用尽时返回原响应, 由调用方照常检查状态码
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0"})
+    return session
+
+
+_SAFE_CALL_WORKERS = 16
+# 当前线程最近一次 _safe_call 是否以默认值收场 (超时/异常), 供 _fast_cached 判断结果能否入缓存
+_CALL_STATE = threading.local()
+
+
+@st.cache_resource
+def _safe_call_executor() -> tuple:
+    """_safe_call 共用的进程级线程池 + 空闲名额计数: 免去每次调用创建/回收线程"""
+    return (concurrent.futures.ThreadPoolExecutor(max_workers=_SAFE_CALL_WORKERS, thread_name_prefix="safecall"),
+            threading.BoundedSemaphore(_SAFE_CALL_WORKERS))
+
+
+def _submit(func) -> concurrent.futures.Future:
+    """有空闲工作线程才进池; 池已占满 (并发取数高峰 / 超时未归还的挂起请求) 时单独起线程,
+    保证超时只计执行时间、不计排队时间, 挂起请求也不会把池耗尽"""
+    executor, slots = _safe_call_executor()
+    if slots.acquire(blocking=False):
+        future = executor.submit(func)
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    future = concurrent.futures.Future()
+
+    def _run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(func())
+            except BaseException as e:
+                future.set_exception(e)
+
+    threading.Thread(target=_run, name="safecall-overflow", daemon=True).start()
+    return future
+
+
 def _safe_call(func, timeout=12, default=None, label=""):
-    """带超时和日志的安全调用"""
+    """带超时和日志的安全调用
+
+    超时即返回默认值, 任务自行跑完 (不再像 with 退出时那样等它结束)。
+    """
+    _CALL_STATE.failed = True
     try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(func)
-            return future.result(timeout=timeout)
+        result = _submit(func).result(timeout=timeout)
+        _CALL_STATE.failed = False
+        return result
     except concurrent.futures.TimeoutError:
         logger.warning(f"[超时] {label} 超过 {timeout}s")
         return default
@@ -72,6 +169,114 @@ def _safe_call(func, timeout=12, default=None, label=""):
         return default
 
 
+def parallel_fetch(funcs: dict) -> dict:
+    """并行执行互不依赖的取数函数 {名称: 无参函数} → {名称: 结果}
+
+    网络 IO 期间释放 GIL, 每项一个线程即可并行; 线程挂载当前脚本上下文,
+    内部 st.cache_data 缓存照常命中。单项异常记为 None, 不影响其他项。
+    """
+    results = dict.fromkeys(funcs)
+
+    def _run(name, func):
+        try:
+            results[name] = func()
+        except Exception as e:
+            logger.error(f"[并行取数异常] {name}: {e}")
+
+    threads = [add_script_run_ctx(threading.Thread(target=_run, args=(name, func), daemon=True))
+               for name, func in funcs.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+@st.cache_resource
+def _prefetch_state() -> tuple:
+    """后台预取线程池与进行中的任务表 (进程内共享)"""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch"), {}
+
+
+def prefetch(funcs: dict):
+    """后台预热取数缓存, 不等待结果 {名称: 无参函数}
+
+    结果落在各函数自身的缓存里, 稍后正式调用时直接命中 (若仍在加载, 缓存层会等待同一次计算);
+    同名任务未完成时不重复提交。各取数函数内部已带 _safe_call 超时, 直接提交即可 (异常留在 future 里)。
+    """
+    executor, pending = _prefetch_state()
+    for name, func in funcs.items():
+        fut = pending.get(name)
+        if fut is None or fut.done():
+            pending[name] = executor.submit(func)
+
+
+# 无参取数函数的进程级缓存: 名称 → (写入时刻, 结果)
+_FAST_CACHE = {}
+_FAST_REFRESHING = set()
+_FAST_LOCK = threading.Lock()
+
+
+def _fast_cached(ttl: int):
+    """无参取数函数的进程级缓存 (替代 st.cache_data)
+
+    命中只做一次字典查找和时间比较, 不经过缓存框架的参数哈希与反序列化;
+    超过 ttl 的 80% 后仍返回旧值, 同时后台线程刷新, 交互重跑不被取数阻塞。
+    返回同一对象, 调用方不得原地修改。
+    """
+    def decorator(func):
+        key = func.__name__
+        load_lock = threading.Lock()
+
+        def _load() -> tuple:
+            """加载 → (是否成功, 结果); 末次 _safe_call 以默认值收场 (超时/异常) 时不写缓存"""
+            _CALL_STATE.failed = False
+            result = func()
+            if _CALL_STATE.failed:
+                return False, result
+            _FAST_CACHE[key] = (time.monotonic(), result)
+            return True, result
+
+        def _refresh():
+            try:
+                _load()
+            except Exception as e:
+                logger.error(f"[后台刷新异常] {key}: {e}")
+            finally:
+                with _FAST_LOCK:
+                    _FAST_REFRESHING.discard(key)
+
+        @functools.wraps(func)
+        def wrapper():
+            ent = _FAST_CACHE.get(key)
+            if ent is not None:
+                age = time.monotonic() - ent[0]
+                if age < ttl * 0.8:
+                    return ent[1]
+                if age < ttl:
+                    with _FAST_LOCK:
+                        start = key not in _FAST_REFRESHING
+                        _FAST_REFRESHING.add(key)
+                    if start:
+                        threading.Thread(target=_refresh, daemon=True).start()
+                    return ent[1]
+            with load_lock:  # 冷启动/已过期: 同步加载, 并发请求只加载一次
+                ent = _FAST_CACHE.get(key)
+                if ent is None or time.monotonic() - ent[0] >= ttl:
+                    ok, result = _load()
+                    # 取数失败不入缓存 (下次重试): 有旧值先沿用旧值, 否则返回本次的默认值
+                    return result if ok or ent is None else ent[1]
+                return ent[1]
+
+        return wrapper
+    return decorator
+
+
+def _clear_fast_cache():
+    """清空进程级缓存 (刷新按钮用)"""
+    _FAST_CACHE.clear()
+
+
 def _import_akshare():
     """延迟导入 AKShare (仅降级时需要)"""
     try:
@@ -89,14 +294,11 @@ def _import_akshare():
 def _get_tushare_pro():
     """获取 Tushare PRO 接口实例 (全局缓存)"""
     try:
-        token = ""
-        try:
-            token = st.secrets.get("TUSHARE_TOKEN", "")
-        except Exception:
-            pass
+        token = _secrets()["TUSHARE_TOKEN"]
         if not token:
             logger.warning("TUSHARE_TOKEN 未配置")
             return None
+        import tushare as ts  # 延迟导入: 首次需要 Tushare 时才加载
         pro = ts.pro_api(token)
         # 简单测试连通性
         logger.info("Tushare PRO 连接成功")
@@ -136,7 +338,7 @@ INDEX_MAP = {
 }
 
 
-@st.cache_data(ttl=600, show_spinner=False)
+@_fast_cached(ttl=600)
 def get_major_indices() -> pd.DataFrame:
     """宽基指数行情 — Tushare 优先"""
     def _tushare_fetch():
@@ -207,7 +409,7 @@ def get_major_indices() -> pd.DataFrame:
 # ============================================================
 # L2. 涨跌统计 (AKShare 为主, Tushare 无直接接口)
 # ============================================================
-@st.cache_data(ttl=600, show_spinner=False)
+@_fast_cached(ttl=600)
 def get_market_overview() -> dict:
     def _fetch():
         ak = _import_akshare()
@@ -216,21 +418,22 @@ def get_market_overview() -> dict:
         df = ak.stock_zh_a_spot_em()
         if df is None or df.empty:
             return {}
-        df["涨跌幅"] = pd.to_numeric(df["涨跌幅"], errors="coerce")
-        df["成交额"] = pd.to_numeric(df["成交额"], errors="coerce")
-        total = len(df)
-        up = int((df["涨跌幅"] > 0).sum())
-        down = int((df["涨跌幅"] < 0).sum())
+        # 取成 NumPy 数组后逐项计数: 不改写原表, 也不为每个条件生成带索引的布尔 Series
+        pct = pd.to_numeric(df["涨跌幅"], errors="coerce").to_numpy(dtype=float)
+        amount = pd.to_numeric(df["成交额"], errors="coerce").to_numpy(dtype=float)
+        total = len(pct)
+        up = int(np.count_nonzero(pct > 0))
+        down = int(np.count_nonzero(pct < 0))
         flat = total - up - down
-        limit_up = int((df["涨跌幅"] >= 9.8).sum())
-        limit_down = int((df["涨跌幅"] <= -9.8).sum())
-        total_amount = round(df["成交额"].sum() / 1e8, 0)
+        limit_up = int(np.count_nonzero(pct >= 9.8))
+        limit_down = int(np.count_nonzero(pct <= -9.8))
+        total_amount = round(float(np.nansum(amount)) / 1e8, 0)
 
         # V4 新增: 市场宽度指标
         up_ratio = round(up / total * 100, 1) if total else 0
         # 涨幅 > 3% 和 < -3% 的数量 (强势/弱势个股)
-        strong_up = int((df["涨跌幅"] >= 3).sum())
-        strong_down = int((df["涨跌幅"] <= -3).sum())
+        strong_up = int(np.count_nonzero(pct >= 3))
+        strong_down = int(np.count_nonzero(pct <= -3))
 
         return {
             "上涨": up, "下跌": down, "平盘": flat,
@@ -247,7 +450,7 @@ def get_market_overview() -> dict:
 # ============================================================
 # L3. 宏观数据 — Tushare PRO 优先 (桥水四维框架)
 # ============================================================
-@st.cache_data(ttl=7200, show_spinner=False)
+@_fast_cached(ttl=7200)
 def get_macro_data() -> dict:
     """
     桥水式四维宏观框架:
@@ -340,57 +543,68 @@ def get_macro_data() -> dict:
         ak = _import_akshare()
         if not ak:
             return {}
-        macro = {}
-        try:
+
+        def _cpi():
             df = ak.macro_china_cpi_monthly()
-            if df is not None and not df.empty:
-                last = df.iloc[-1]
-                macro["CPI同比"] = str(last.iloc[-1])
-                macro["CPI月份"] = str(last.iloc[0])
-        except Exception:
-            pass
-        try:
+            if df is None or df.empty:
+                return {}
+            last = df.iloc[-1]
+            return {"CPI同比": str(last.iloc[-1]), "CPI月份": str(last.iloc[0])}
+
+        def _pmi():
             df = ak.macro_china_pmi()
-            if df is not None and not df.empty:
-                last = df.iloc[-1]
-                macro["制造业PMI"] = str(last.iloc[-1])
-                macro["PMI月份"] = str(last.iloc[0])
-        except Exception:
-            pass
-        try:
-            df = ak.bond_zh_us_rate(start_date="20250101")
-            if df is not None and not df.empty:
-                latest = df.iloc[-1]
-                for col in df.columns:
-                    if "中国" in str(col) and "10" in str(col):
-                        macro["中国10Y国债"] = f"{latest[col]}%"
-                    if "美国" in str(col) and "10" in str(col):
-                        macro["美国10Y国债"] = f"{latest[col]}%"
-        except Exception:
-            pass
-        try:
+            if df is None or df.empty:
+                return {}
+            last = df.iloc[-1]
+            return {"制造业PMI": str(last.iloc[-1]), "PMI月份": str(last.iloc[0])}
+
+        def _bond():
+            # 只用最新一行, 起始日取近两周即可 (接口按区间整段下载)
+            df = ak.bond_zh_us_rate(start_date=(datetime.now() - timedelta(days=14)).strftime("%Y%m%d"))
+            if df is None or df.empty:
+                return {}
+            latest, out = df.iloc[-1], {}
+            for col in df.columns:
+                if "中国" in str(col) and "10" in str(col):
+                    out["中国10Y国债"] = f"{latest[col]}%"
+                if "美国" in str(col) and "10" in str(col):
+                    out["美国10Y国债"] = f"{latest[col]}%"
+            return out
+
+        def _fx():
             df = ak.currency_boc_sina(symbol="美元",
                                        start_date=(datetime.now() - timedelta(days=10)).strftime("%Y%m%d"))
-            if df is not None and not df.empty:
-                val = df.iloc[-1].iloc[1] if len(df.columns) > 1 else None
-                if val:
-                    macro["美元兑人民币"] = str(val)
-        except Exception:
-            pass
+            if df is None or df.empty:
+                return {}
+            val = df.iloc[-1].iloc[1] if len(df.columns) > 1 else None
+            return {"美元兑人民币": str(val)} if val else {}
+
+        # 各接口互不依赖, 并行拉取: 单个慢接口不再拖垮其余几项
+        parts = parallel_fetch({"cpi": _cpi, "pmi": _pmi, "bond": _bond, "fx": _fx})
+        macro = {}
+        for part in parts.values():
+            macro.update(part or {})
         return macro
 
     # Tushare 优先
     result = _safe_call(_tushare_fetch, timeout=20, default=None, label="宏观[TS]")
+    if not result:
+        logger.info("[降级] 宏观数据 → AKShare")
+        result = _safe_call(_akshare_fetch, timeout=15, default={}, label="宏观[AK]")
     if result:
+        _save_last_good("macro", result)
         return result
-    logger.info("[降级] 宏观数据 → AKShare")
-    return _safe_call(_akshare_fetch, timeout=15, default={}, label="宏观[AK]")
+    stale = _load_last_good("macro")
+    if stale:
+        logger.warning("[兜底] 宏观数据 → 上次成功结果")
+        return stale
+    return {}
 
 
 # ============================================================
 # L4. 流动性指标 (V4新增 — 桥水框架核心)
 # ============================================================
-@st.cache_data(ttl=3600, show_spinner=False)
+@_fast_cached(ttl=3600)
 def get_liquidity_data() -> dict:
     """流动性维度: Shibor / DR007 / 央行OMO净投放"""
     def _tushare_fetch():
@@ -451,7 +665,7 @@ def get_liquidity_data() -> dict:
 # ============================================================
 # L5. 信用利差 (V4新增 — 桥水框架: 信用周期)
 # ============================================================
-@st.cache_data(ttl=7200, show_spinner=False)
+@_fast_cached(ttl=7200)
 def get_credit_spread() -> dict:
     """信用利差: AA-企业债 vs 国债, 信用扩张/收缩判断"""
     def _fetch():
@@ -482,7 +696,7 @@ def get_credit_spread() -> dict:
 # ============================================================
 # L6. 北向资金 — Tushare 优先
 # ============================================================
-@st.cache_data(ttl=600, show_spinner=False)
+@_fast_cached(ttl=600)
 def get_northbound_flow() -> dict:
     def _tushare_fetch():
         pro = _get_tushare_pro()
@@ -544,7 +758,7 @@ def get_northbound_flow() -> dict:
 # ============================================================
 # L7. 融资融券 (Tushare PRO)
 # ============================================================
-@st.cache_data(ttl=3600, show_spinner=False)
+@_fast_cached(ttl=3600)
 def get_margin_data() -> dict:
     def _fetch():
         pro = _get_tushare_pro()
@@ -586,7 +800,7 @@ STYLE_INDICES = {
 }
 
 
-@st.cache_data(ttl=600, show_spinner=False)
+@_fast_cached(ttl=600)
 def get_style_data() -> dict:
     def _tushare_fetch():
         pro = _get_tushare_pro()
@@ -668,7 +882,7 @@ def get_style_data() -> dict:
 # ============================================================
 # L9. 波动率 (V4新增 — 基于沪深300日线自算HV20)
 # ============================================================
-@st.cache_data(ttl=3600, show_spinner=False)
+@_fast_cached(ttl=3600)
 def get_volatility_data() -> dict:
     """历史波动率 + 成交量动量"""
     def _tushare_fetch():
@@ -727,37 +941,49 @@ def get_sentiment_temperature(overview: dict = None, northbound: dict = None,
     - 成交额动量 (权重20%)
     - 波动率逆向 (权重15%, 低波看多)
     """
+    # 只取打分用到的标量作为缓存键 (缺失的数据块记为 None)
+    temperature, level, details = _sentiment_temperature_core(
+        overview.get("上涨占比", 50) if overview else None,
+        northbound.get("今日净流入亿", 0) if northbound else None,
+        margin.get("融资5日变化亿", 0) if margin else None,
+        (volatility.get("成交额5/20比", 1), volatility.get("沪深300_HV20", 15)) if volatility else None,
+    )
+    return {
+        "温度": temperature,
+        "级别": level,
+        "分项": dict(details),
+    }
+
+
+@functools.lru_cache(maxsize=256)
+def _sentiment_temperature_core(up_pct, nb_val, rz_chg, vol) -> tuple:
     score = 50  # 中性基准
-    details = {}
+    details = []
 
-    if overview:
-        up_pct = overview.get("上涨占比", 50)
+    if up_pct is not None:
         # 上涨占比 > 60% 乐观, < 40% 悲观
         s1 = min(max((up_pct - 30) / 40 * 100, 0), 100)
-        details["赚钱效应"] = round(s1, 0)
+        details.append(("赚钱效应", round(s1, 0)))
         score = score * 0.75 + s1 * 0.25
 
-    if northbound:
-        nb_val = northbound.get("今日净流入亿", 0)
+    if nb_val is not None:
         s2 = min(max((nb_val + 100) / 200 * 100, 0), 100)
-        details["北向情绪"] = round(s2, 0)
+        details.append(("北向情绪", round(s2, 0)))
         score = score * 0.80 + s2 * 0.20
 
-    if margin:
-        rz_chg = margin.get("融资5日变化亿", 0)
+    if rz_chg is not None:
         s3 = min(max((rz_chg + 200) / 400 * 100, 0), 100)
-        details["杠杆情绪"] = round(s3, 0)
+        details.append(("杠杆情绪", round(s3, 0)))
         score = score * 0.80 + s3 * 0.20
 
-    if volatility:
-        vol_ratio = volatility.get("成交额5/20比", 1)
+    if vol is not None:
+        vol_ratio, hv = vol
         s4 = min(max(vol_ratio * 50, 0), 100)
-        details["量能情绪"] = round(s4, 0)
+        details.append(("量能情绪", round(s4, 0)))
         score = score * 0.80 + s4 * 0.20
 
-        hv = volatility.get("沪深300_HV20", 15)
         s5 = min(max((30 - hv) / 20 * 100, 0), 100)  # 低波乐观
-        details["波动率情绪"] = round(s5, 0)
+        details.append(("波动率情绪", round(s5, 0)))
         score = score * 0.85 + s5 * 0.15
 
     temperature = round(score, 0)
@@ -772,52 +998,58 @@ def get_sentiment_temperature(overview: dict = None, northbound: dict = None,
     else:
         level = "❄️ 极冷 (恐惧)"
 
-    return {
-        "温度": temperature,
-        "级别": level,
-        "分项": details,
-    }
+    return temperature, level, tuple(details)
 
 
 # ============================================================
 # L11. 板块数据 (AKShare 为主)
 # ============================================================
-@st.cache_data(ttl=900, show_spinner=False)
-def get_industry_board() -> pd.DataFrame:
-    def _fetch():
-        ak = _import_akshare()
-        if not ak:
-            return pd.DataFrame()
-        df = ak.stock_board_industry_name_em()
-        if df is not None and not df.empty:
-            for c in ["涨跌幅", "总市值", "换手率"]:
-                if c in df.columns:
-                    df[c] = pd.to_numeric(df[c], errors="coerce")
-            return df.sort_values("涨跌幅", ascending=False).reset_index(drop=True)
-        return pd.DataFrame()
-    return _safe_call(_fetch, timeout=12, default=pd.DataFrame(), label="行业板块")
+_BOARD_COLUMNS = ["板块名称", "涨跌幅", "总市值", "换手率", "上涨家数", "下跌家数"]
+_ETF_COLUMNS = ["代码", "名称", "最新价", "涨跌幅", "成交额"]
 
 
-@st.cache_data(ttl=900, show_spinner=False)
-def get_concept_board() -> pd.DataFrame:
+def _compact_table(df: pd.DataFrame, columns: list, numeric: list) -> pd.DataFrame:
+    """只保留展示用到的列, 数值列下转 float32 (缓存/序列化体积约减半)
+
+    列名全不匹配 (上游改名) 时退回前 len(columns) 列, 避免把上游整张宽表发往前端。
+    """
+    keep = [c for c in columns if c in df.columns] or list(df.columns[:len(columns)])
+    return df[keep].assign(**{
+        c: pd.to_numeric(df[c], errors="coerce", downcast="float") for c in numeric if c in df.columns
+    })
+
+
+@st.cache_resource(ttl=900, show_spinner=False)
+def _board_table(ak_func: str, label: str) -> pd.DataFrame:
+    """板块全表 (按涨跌幅降序), 行业/概念共用; 按 AKShare 接口名缓存"""
     def _fetch():
         ak = _import_akshare()
         if not ak:
             return pd.DataFrame()
-        df = ak.stock_board_concept_name_em()
+        df = getattr(ak, ak_func)()
         if df is not None and not df.empty:
-            for c in ["涨跌幅", "总市值", "换手率"]:
-                if c in df.columns:
-                    df[c] = pd.to_numeric(df[c], errors="coerce")
+            df = _compact_table(df, _BOARD_COLUMNS, ["涨跌幅", "总市值", "换手率"])
             return df.sort_values("涨跌幅", ascending=False).reset_index(drop=True)
         return pd.DataFrame()
-    return _safe_call(_fetch, timeout=12, default=pd.DataFrame(), label="概念板块")
+    return _safe_call(_fetch, timeout=12, default=pd.DataFrame(), label=label)
+
+
+def get_industry_board(limit: int = None) -> pd.DataFrame:
+    """行业板块; limit 只取涨幅前 N 行 (全表只缓存一份, 各调用方按需切片)"""
+    df = _board_table("stock_board_industry_name_em", "行业板块")
+    return df if limit is None else df.iloc[:limit]
+
+
+def get_concept_board(limit: int = None) -> pd.DataFrame:
+    """概念板块; limit 同上"""
+    df = _board_table("stock_board_concept_name_em", "概念板块")
+    return df if limit is None else df.iloc[:limit]
 
 
 # ============================================================
 # L12. ETF — Tushare 优先
 # ============================================================
-@st.cache_data(ttl=900, show_spinner=False)
+@st.cache_resource(ttl=900, show_spinner=False)
 def get_etf_list() -> pd.DataFrame:
     def _tushare_fetch():
         pro = _get_tushare_pro()
@@ -832,9 +1064,7 @@ def get_etf_list() -> pd.DataFrame:
             # 获取当日行情 (取前100只主要ETF)
             top_etfs = df_basic.head(150)
             rows = []
-            for _, etf in top_etfs.iterrows():
-                ts_code = etf.get("ts_code", "")
-                name = etf.get("name", "")
+            for ts_code, name in top_etfs[["ts_code", "name"]].itertuples(index=False):
                 try:
                     df_q = pro.fund_daily(ts_code=ts_code, start_date=today, end_date=today)
                     if df_q is not None and not df_q.empty:
@@ -851,7 +1081,7 @@ def get_etf_list() -> pd.DataFrame:
                 if len(rows) >= 80:
                     break
             if rows:
-                df = pd.DataFrame(rows)
+                df = _compact_table(pd.DataFrame(rows), _ETF_COLUMNS, ["最新价", "涨跌幅", "成交额"])
                 df = df.sort_values("成交额", ascending=False).reset_index(drop=True)
                 return df
         except Exception as e:
@@ -864,9 +1094,7 @@ def get_etf_list() -> pd.DataFrame:
             return pd.DataFrame()
         df = ak.fund_etf_spot_em()
         if df is not None and not df.empty:
-            for c in ["最新价", "涨跌幅", "成交额"]:
-                if c in df.columns:
-                    df[c] = pd.to_numeric(df[c], errors="coerce")
+            df = _compact_table(df, _ETF_COLUMNS, ["最新价", "涨跌幅", "成交额"])
             return df.sort_values("成交额", ascending=False).head(80).reset_index(drop=True)
         return pd.DataFrame()
 
@@ -922,14 +1150,41 @@ _CATEGORY_RULES = {
 }
 
 
+# 分类/重要性判定用到的全部关键词 (噪声词单独用 _NOISE_RE 判定)
+_NEWS_KEYWORDS = _IMPORTANT_WORDS | frozenset(kw for keywords in _CATEGORY_RULES.values() for kw in keywords)
+
+
+def _build_news_matcher():
+    """资讯关键词单次扫描匹配器: text → 命中关键词集合 (含重叠命中)"""
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for word in _NEWS_KEYWORDS:
+            automaton.add_word(word, word)
+        automaton.make_automaton()
+        return lambda text: {word for _, word in automaton.iter(text)}
+    # 降级: 零宽前瞻逐位置取最长词, 首字字符类快速跳过不可能起词的位置;
+    # 同一位置起始的较短词 (如 财政/财政部) 由前缀表补回
+    words = sorted(_NEWS_KEYWORDS, key=len, reverse=True)
+    first_chars = "".join(sorted({re.escape(w[0]) for w in words}))
+    pattern = re.compile(f"(?=[{first_chars}])(?=({'|'.join(map(re.escape, words))}))")
+    prefixes = {w: frozenset(v for v in words if w.startswith(v)) for w in words}
+    return lambda text: set().union(*(prefixes[w] for w in pattern.findall(text)))
+
+
+_match_news_keywords = _build_news_matcher()
+# 噪声过滤只需判断是否命中, 短标题上普通交替正则 search 最快
+_NOISE_RE = re.compile("|".join(map(re.escape, sorted(_NOISE_WORDS, key=len, reverse=True))))
+
+
+def _is_noise(title: str) -> bool:
+    return _NOISE_RE.search(title) is not None
+
+
 def _classify_news(title: str, content: str = "") -> tuple:
-    text = title + content[:100]
-    category = "综合财经"
-    for cat, keywords in _CATEGORY_RULES.items():
-        if any(kw in text for kw in keywords):
-            category = cat
-            break
-    is_important = any(w in text for w in _IMPORTANT_WORDS)
+    hits = _match_news_keywords(title + content[:100])
+    category = next((cat for cat, keywords in _CATEGORY_RULES.items() if not hits.isdisjoint(keywords)),
+                    "综合财经")
+    is_important = not _IMPORTANT_WORDS.isdisjoint(hits)
     return category, is_important
 
 
@@ -946,21 +1201,30 @@ def get_tushare_news(count: int = 150) -> list:
 
     raw_news = []
     source_stats = {}
+    # 标题前缀去重: 各源按层级从高到低遍历 (新闻联播标题带前缀, 不与其他源撞键),
+    # 先到的即优先保留的那条, 之后的重复在分类前直接跳过
+    seen = set()
+    duplicates = 0
 
     for src, name, tier, limit in TUSHARE_NEWS_SOURCES:
         try:
             df = pro.news(src=src, start_date=start_time, end_date=end_time)
             fetched = 0
             if df is not None and not df.empty:
-                for _, row in df.head(limit).iterrows():
+                for row in df.head(limit).to_dict("records"):
                     title = str(row.get("title", "")).strip()
                     content = str(row.get("content", ""))[:600].strip()
                     dt = str(row.get("datetime", ""))
                     channels = str(row.get("channels", ""))
                     if not title or len(title) < 6:
                         continue
-                    if any(w in title for w in _NOISE_WORDS):
+                    if _is_noise(title):
+                        continue
+                    key = title[:30].strip()
+                    if key in seen:
+                        duplicates += 1
                         continue
+                    seen.add(key)
                     category, is_important = _classify_news(title, content)
                     pub_time = dt.split(" ")[1][:5] if " " in dt else dt[:16]
                     raw_news.append({
@@ -982,13 +1246,18 @@ def get_tushare_news(count: int = 150) -> list:
         df_cctv = pro.cctv_news(date=yesterday)
         if df_cctv is not None and not df_cctv.empty:
             cctv_count = 0
-            for _, row in df_cctv.head(15).iterrows():
+            for row in df_cctv.head(15).to_dict("records"):
                 title = str(row.get("title", "")).strip()
                 content = str(row.get("content", ""))[:400].strip()
                 if title and len(title) > 5:
+                    title = f"[新闻联播] {title}"
+                    key = title[:30].strip()
+                    if key in seen:
+                        continue
+                    seen.add(key)
                     raw_news.append({
                         "time": "CCTV", "datetime": yesterday,
-                        "title": f"[新闻联播] {title}", "content": content,
+                        "title": title, "content": content,
                         "important": True, "source": "新闻联播", "source_id": "cctv",
                         "tier": "T0", "category": "宏观政策", "channels": "",
                     })
@@ -997,21 +1266,10 @@ def get_tushare_news(count: int = 150) -> list:
     except Exception as e:
         logger.warning(f"[采集失败] 新闻联播: {e}")
 
-    logger.info(f"[汇总] 原始 {len(raw_news)} 条 | {source_stats}")
-
-    # 智能去重
-    seen_titles = {}
+    logger.info(f"[汇总] 原始 {len(raw_news) + duplicates} 条 | {source_stats}")
+    logger.info(f"[去重] {len(raw_news) + duplicates} → {len(raw_news)} 条")
     tier_priority = {"T0": 0, "T1": 1, "T2": 2, "T3": 3}
-    for item in raw_news:
-        key = item["title"][:30].strip()
-        if key not in seen_titles:
-            seen_titles[key] = item
-        else:
-            existing = seen_titles[key]
-            if tier_priority.get(item["tier"], 9) < tier_priority.get(existing["tier"], 9):
-                seen_titles[key] = item
-    deduped = list(seen_titles.values())
-    logger.info(f"[去重] {len(raw_news)} → {len(deduped)} 条")
+    deduped = raw_news
 
     # 质量排序 (V4: 增加时间衰减)
     def _sort_key(item):
@@ -1033,6 +1291,15 @@ def get_tushare_news(count: int = 150) -> list:
     return final
 
 
+# 快讯富文本偶带 <a>/<b> 等标签片段, 用预编译正则剥离即可, 无需 HTML 解析器
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+
+
+def _strip_tags(text: str) -> str:
+    return _WS_RE.sub(" ", _TAG_RE.sub("", text)).strip() if "<" in text else text
+
+
 @st.cache_data(ttl=300, show_spinner=False)
 def get_sina_flash(count: int = 30) -> list:
     """新浪 7×24 快讯 — 降级补充"""
@@ -1042,8 +1309,7 @@ def get_sina_flash(count: int = 30) -> list:
             if len(telegraphs) >= count:
                 break
             url = f"https://zhibo.sina.com.cn/api/zhibo/feed?page={page}&page_size=100&zhibo_id=152&tag_id=0&dire=f&dpc=1"
-            headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0"}
-            resp = requests.get(url, headers=headers, timeout=6, verify=False)
+            resp = _http_session().get(url, timeout=6, verify=False)
             if resp.status_code == 200:
                 items = resp.json().get("result", {}).get("data", {}).get("feed", {}).get("list", [])
                 if not items:
@@ -1051,7 +1317,7 @@ def get_sina_flash(count: int = 30) -> list:
                 for item in items:
                     if len(telegraphs) >= count:
                         break
-                    rich_text = item.get("rich_text", "")
+                    rich_text = _strip_tags(item.get("rich_text", ""))
                     if not rich_text:
                         continue
                     if "】" in rich_text and rich_text.startswith("【"):
@@ -1061,7 +1327,7 @@ def get_sina_flash(count: int = 30) -> list:
                     else:
                         title = rich_text[:60] + "..."
                         content = rich_text
-                    if any(w in title for w in _NOISE_WORDS):
+                    if _is_noise(title):
                         continue
                     time_str = item.get("create_time", "")
                     pub_time = time_str.split(" ")[1][:5] if " " in time_str else time_str
@@ -1115,7 +1381,7 @@ def get_research_reports(count: int = 30) -> list:
         if df is not None and not df.empty:
             if "report_date" in df.columns:
                 df = df.sort_values("report_date", ascending=False)
-            for _, row in df.head(count).iterrows():
+            for row in df.head(count).to_dict("records"):
                 reports.append({
                     "stock_name": str(row.get("name", row.get("ts_code", ""))),
                     "ts_code": str(row.get("ts_code", "")),
@@ -1135,7 +1401,7 @@ def get_research_reports(count: int = 30) -> list:
 # ============================================================
 # L15. 商品期货 (AKShare)
 # ============================================================
-@st.cache_data(ttl=900, show_spinner=False)
+@_fast_cached(ttl=900)
 def get_futures_overview() -> dict:
     def _fetch():
         ak = _import_akshare()
@@ -1175,28 +1441,49 @@ def get_futures_overview() -> dict:
 
 
 # ============================================================
-# L16. 全量数据打包 (供 AI CIO日报)
+# L16. 全量数据打包 (驾驶舱面板 / AI CIO日报)
 # ============================================================
+# 驾驶舱面板取数项: 互不依赖的 IO 型调用, 各自已带 _safe_call 超时与默认值
+_DASHBOARD_FETCHERS = {
+    "macro": get_macro_data,
+    "liquidity": get_liquidity_data,
+    "credit": get_credit_spread,
+    "volatility": get_volatility_data,
+    "style": get_style_data,
+    "indices": get_major_indices,
+    "overview": get_market_overview,
+    "northbound": get_northbound_flow,
+    "margin": get_margin_data,
+    "futures": get_futures_overview,
+}
+
+
+def prefetch_dashboard() -> dict:
+    """驾驶舱面板数据一次并行拉取 → {名称: 结果}
+
+    耗时≈最慢一项而非各项超时之和; 页面顶部调用一次, 结果字典向下传给各面板。
+    """
+    return parallel_fetch(_DASHBOARD_FETCHERS)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
 def get_daily_data_pack() -> dict:
-    """一次性获取所有数据"""
-    return {
-        "indices": get_major_indices(),
-        "overview": get_market_overview(),
-        "industry": get_industry_board(),
-        "concept": get_concept_board(),
-        "macro": get_macro_data(),
-        "liquidity": get_liquidity_data(),
-        "credit": get_credit_spread(),
-        "style": get_style_data(),
-        "volatility": get_volatility_data(),
-        "etf": get_etf_list(),
-        "northbound": get_northbound_flow(),
-        "margin": get_margin_data(),
-        "futures": get_futures_overview(),
-        "news": get_all_news(tushare_count=150),
-        "research": get_research_reports(30),
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
-    }
+    """一次性获取所有数据 (整包缓存 5 分钟: 重复生成报告不再逐项查缓存/拉取)
+
+    各项互不依赖, 并行拉取, 耗时≈最慢一项; 单项异常记为 None, 由报告页数据审计标为缺失。
+    """
+    pack = parallel_fetch({
+        **_DASHBOARD_FETCHERS,
+        "industry": get_industry_board,
+        "concept": get_concept_board,
+        "etf": get_etf_list,
+        "news": functools.partial(get_all_news, tushare_count=150),
+        "research": functools.partial(get_research_reports, 30),
+    })
+    pack["news"] = pack["news"] or []
+    pack["research"] = pack["research"] or []
+    pack["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+    return pack
 
 
 def pack_market_text(pack: dict) -> str:
@@ -1207,10 +1494,11 @@ def pack_market_text(pack: dict) -> str:
     idx = pack.get("indices")
     if idx is not None and not idx.empty:
         mp.append("\n### 宽基指数")
-        for _, r in idx.iterrows():
-            chg = r.get("涨跌幅", 0)
+        blank = pd.Series("", index=idx.index)
+        for name, price, chg in zip(idx.get("名称", blank), idx.get("最新价", blank),
+                                    idx.get("涨跌幅", pd.Series(0, index=idx.index))):
             if pd.notna(chg):
-                mp.append(f"- {r.get('名称','')}: {r.get('最新价','')} ({chg:+.2f}%)")
+                mp.append(f"- {name}: {price} ({chg:+.2f}%)")
 
     # 涨跌统计
     ov = pack.get("overview", {})
@@ -1296,8 +1584,9 @@ def pack_market_text(pack: dict) -> str:
     ind = pack.get("industry")
     if ind is not None and not ind.empty and "板块名称" in ind.columns and "涨跌幅" in ind.columns:
         mp.append(f"\n### 行业板块")
-        mp.append("涨幅TOP5: " + ", ".join(f"{r['板块名称']}({r['涨跌幅']:+.1f}%)" for _, r in ind.head(5).iterrows()))
-        mp.append("跌幅TOP5: " + ", ".join(f"{r['板块名称']}({r['涨跌幅']:+.1f}%)" for _, r in ind.tail(5).iterrows()))
+        names, chgs = ind["板块名称"].to_numpy(), ind["涨跌幅"].to_numpy()
+        mp.append("涨幅TOP5: " + ", ".join(f"{n}({c:+.1f}%)" for n, c in zip(names[:5], chgs[:5])))
+        mp.append("跌幅TOP5: " + ", ".join(f"{n}({c:+.1f}%)" for n, c in zip(names[-5:], chgs[-5:])))
 
     # 情绪温度计
     sentiment = get_sentiment_temperature(ov, nb, margin, vol)
@@ -1721,14 +2010,12 @@ def calc_moneyflow_factors(mf_df: pd.DataFrame) -> dict:
         net_main = (buy_elg - sell_elg + buy_lg - sell_lg)
         factors["主力净流入"] = round(net_main, 0)
 
-        # 5日累计主力净流入
+        # 5日累计主力净流入 (逐日主力净额整列算一次, 不再逐行构造 Series)
+        net = (mf_df.get("buy_elg_vol", 0) - mf_df.get("sell_elg_vol", 0)
+               + mf_df.get("buy_lg_vol", 0) - mf_df.get("sell_lg_vol", 0))
+        net = pd.Series(net, index=mf_df.index).astype(float).to_numpy()
         if len(mf_df) >= 5:
-            recent5 = mf_df.tail(5)
-            net5 = 0
-            for _, r in recent5.iterrows():
-                net5 += (float(r.get("buy_elg_vol", 0)) - float(r.get("sell_elg_vol", 0))
-                         + float(r.get("buy_lg_vol", 0)) - float(r.get("sell_lg_vol", 0)))
-            factors["主力净流入_5日"] = round(net5, 0)
+            factors["主力净流入_5日"] = round(float(net[-5:].sum()), 0)
 
         # 超大单占比
         total_vol = float(latest.get("buy_elg_vol", 0)) + float(latest.get("sell_elg_vol", 0))
@@ -1736,16 +2023,9 @@ def calc_moneyflow_factors(mf_df: pd.DataFrame) -> dict:
         if total_all > 0:
             factors["超大单占比"] = round(total_vol / max(total_all, 1) * 100, 1)
 
-        # 连续净流入天数
-        consecutive = 0
-        for i in range(len(mf_df) - 1, -1, -1):
-            r = mf_df.iloc[i]
-            net = (float(r.get("buy_elg_vol", 0)) - float(r.get("sell_elg_vol", 0))
-                   + float(r.get("buy_lg_vol", 0)) - float(r.get("sell_lg_vol", 0)))
-            if net > 0:
-                consecutive += 1
-            else:
-                break
+        # 连续净流入天数: 从最近一日往前数连续为正的天数
+        inflow = net[::-1] > 0
+        consecutive = len(inflow) if inflow.all() else int(inflow.argmin())
         factors["主力连续流入天数"] = consecutive
 
     except Exception as e:
@@ -1918,5 +2198,6 @@ def quant_stock_screener(
 
 
 # 兼容旧接口
+@st.cache_data(ttl=300, show_spinner=False)
 def get_cls_telegraph(count: int = 50) -> list:
     return get_all_news(tushare_count=max(count, 80))
\ No newline at end of file
@@ -0,0 +1,286 @@
+"""
+驾驶舱面板模块 - 寻星情报中心
+================================================================
+pages/2_Market.py 各层面板的渲染函数: 页面负责取数, 这里只负责展示
+================================================================
+"""
+import streamlit as st
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import threading
+from itertools import islice
+
+from utils.data_fetcher import (
+    get_industry_board, get_concept_board, get_etf_list,
+    get_research_reports, get_sentiment_temperature,
+)
+
+
+def _kv_lines(values: dict) -> str:
+    """键值对拼成一段 markdown (行尾两空格换行): 整张卡片只发一个 caption 元素"""
+    return "  \n".join(f"{k}: **{v}**" for k, v in values.items())
+
+
+def _render_kv_card(title: str, values: dict):
+    with st.container(border=True):
+        st.markdown(title)
+        if values:
+            st.caption(_kv_lines(values))
+        else:
+            st.caption("暂无数据")
+
+
+# ============================================================
+# 第一层: 桥水式宏观四维
+# ============================================================
+def render_macro_panel(macro: dict, liquidity: dict, credit: dict, volatility: dict):
+    st.subheader("🧭 宏观环境 — 桥水四维框架")
+    col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+
+    with col_m1:
+        with st.container(border=True):
+            st.markdown("**📈 增长 & 通胀**")
+            if macro:
+                display = {k: v for k, v in macro.items()
+                          if k not in ("CPI月份", "PMI月份") and v not in ("—", "超时", "", None)}
+                if display:
+                    text = _kv_lines(display)
+                    cpi_m = macro.get("CPI月份", "")
+                    pmi_m = macro.get("PMI月份", "")
+                    if cpi_m or pmi_m:
+                        text += f"  \n📅 CPI {cpi_m} | PMI {pmi_m}"
+                    st.caption(text)
+                else:
+                    st.caption("暂无数据")
+            else:
+                st.warning("宏观数据暂不可用")
+
+    with col_m2:
+        _render_kv_card("**💧 流动性**", liquidity)
+    with col_m3:
+        _render_kv_card("**🏦 信用环境**", credit)
+    with col_m4:
+        _render_kv_card("**📊 波动率 & 量能**", volatility)
+
+
+# ============================================================
+# 第二层: 风格动量 (5日 + 20日)
+# ============================================================
+def render_style_panel(style: dict):
+    st.subheader("🎭 市场风格与动量")
+
+    if not style:
+        st.warning("风格数据暂不可用")
+        return
+
+    col_s1, col_s2 = st.columns(2)
+    with col_s1:
+        with st.container(border=True):
+            st.markdown("**📐 大小盘风格**")
+            sc1, sc2 = st.columns(2)
+            with sc1:
+                st.metric("5日偏好", style.get("大小盘偏好_5日", "—"))
+                st.caption(f"沪深300: {style.get('沪深300_5日', '—')}%  \n中证1000: {style.get('中证1000_5日', '—')}%")
+            with sc2:
+                st.metric("20日趋势", style.get("大小盘偏好_20日", "—"))
+                st.caption(f"沪深300: {style.get('沪深300_20日', '—')}%  \n中证1000: {style.get('中证1000_20日', '—')}%")
+    with col_s2:
+        with st.container(border=True):
+            st.markdown("**🎯 成长/价值风格**")
+            sc3, sc4 = st.columns(2)
+            with sc3:
+                st.metric("5日偏好", style.get("成长价值_5日", "—"))
+                st.caption(f"创业板指: {style.get('创业板指_5日', '—')}%  \n上证50: {style.get('上证50_5日', '—')}%")
+            with sc4:
+                st.metric("20日趋势", style.get("成长价值_20日", "—"))
+                st.caption(f"创业板指: {style.get('创业板指_20日', '—')}%  \n上证50: {style.get('上证50_20日', '—')}%")
+    if "中证500_5日" in style:
+        st.caption(f"中证500: 5日 {style.get('中证500_5日', '')}% | 20日 {style.get('中证500_20日', '')}%")
+
+
+# ============================================================
+# 第三层: 指数 + 涨跌 + 情绪温度计
+# ============================================================
+def render_index_strip(idx_df: pd.DataFrame, ov: dict, nb_data: dict, margin_data: dict, volatility: dict):
+    st.subheader("📈 宽基指数与市场情绪")
+
+    if idx_df is not None and not idx_df.empty and "error" not in idx_df.columns:
+        shown = idx_df.iloc[:7]  # 一行最多 7 个指标, 列数固定不随数据增长
+        cols = st.columns(len(shown))
+        zero = pd.Series(0, index=shown.index)
+        for col, name, price, chg in zip(cols, shown.get("名称", pd.Series("", index=shown.index)),
+                                         shown.get("最新价", zero), shown.get("涨跌幅", zero)):
+            col.metric(
+                name,
+                f"{price:,.2f}" if pd.notna(price) else "—",
+                f"{chg:+.2f}%" if pd.notna(chg) else "—",
+                delta_color="normal" if (pd.notna(chg) and chg >= 0) else "inverse",
+            )
+
+    if ov and "error" not in ov:
+        col_ov1, col_ov2 = st.columns([3, 1])
+        with col_ov1:
+            with st.container(border=True):
+                c1, c2, c3, c4, c5, c6 = st.columns(6)
+                c1.metric("上涨", ov.get("上涨", 0), f"{ov.get('上涨占比', 0)}%")
+                c2.metric("下跌", ov.get("下跌", 0))
+                c3.metric("涨停", ov.get("涨停", 0))
+                c4.metric("跌停", ov.get("跌停", 0))
+                c5.metric("强势(>3%)", ov.get("强势股", 0))
+                c6.metric("成交额", f"{ov.get('总成交额亿', 0):,.0f}亿")
+        with col_ov2:
+            sentiment = get_sentiment_temperature(ov, nb_data, margin_data, volatility)
+            with st.container(border=True):
+                st.markdown("**🌡️ 情绪温度**")
+                temp = sentiment.get("温度", 50)
+                st.metric("综合", f"{temp:.0f}", sentiment.get("级别", ""))
+                details = sentiment.get("分项", {})
+                if details:
+                    st.caption("  \n".join(f"{k}: {v:.0f}" for k, v in details.items()))
+
+
+# ============================================================
+# 第四层: 资金 + 期货
+# ============================================================
+def render_futures(futures: dict):
+    if not futures:
+        st.info("期货暂不可用")
+        return
+    fut_df = pd.DataFrame(
+        [(name, quote.get("price"), quote.get("chg_pct", 0)) for name, quote in islice(futures.items(), 6)],
+        columns=["品种", "价格", "涨跌%"],
+    )
+    chg = fut_df["涨跌%"].to_numpy()
+    fut_df.insert(0, "", np.select([chg > 0, chg < 0], ["🟢", "🔴"], "⚪"))
+    with st.container(border=True):
+        st.markdown("**🛢️ 商品期货 (CTA)**")
+        st.dataframe(fut_df, hide_index=True, use_container_width=True,
+                     column_config={"涨跌%": st.column_config.NumberColumn(format="%+.1f%%")})
+
+
+def render_fund_flow(nb_data: dict, margin_data: dict, futures: dict):
+    st.subheader("💰 资金流向与商品期货")
+
+    col_f1, col_f2, col_f3 = st.columns(3)
+
+    with col_f1:
+        if nb_data:
+            with st.container(border=True):
+                st.markdown("**🌏 北向资金**")
+                direction = nb_data.get("方向", "")
+                color = "🟢" if "入" in direction else "🔴"
+                st.metric(f"{color} {direction}", f"{nb_data.get('今日净流入亿', 0)} 亿")
+                st.caption(f"5日均值: {nb_data.get('5日均值亿', 0)} 亿")
+        else:
+            st.info("北向资金暂不可用")
+
+    with col_f2:
+        if margin_data:
+            with st.container(border=True):
+                st.markdown("**📊 融资融券**")
+                emotion = margin_data.get("杠杆情绪", "")
+                emoji = "🔥" if emotion == "加杠杆" else "❄️"
+                st.metric(f"{emoji} {emotion}", f"融资 {margin_data.get('融资余额亿', 0)} 亿")
+                st.caption(f"5日变化: {margin_data.get('融资5日变化亿', 0)} 亿 | 融券: {margin_data.get('融券余额亿', 0)} 亿")
+        else:
+            st.info("融资融券: 需配置 Tushare PRO")
+
+    with col_f3:
+        render_futures(futures)
+
+
+# ============================================================
+# 第五层: 板块 + ETF + 研报
+# ============================================================
+# 表格显示格式 (取数层已下转 float32, 由前端按格式显示, 不在 Python 侧逐列格式化)
+_TABLE_FORMATS = {
+    "最新价": st.column_config.NumberColumn(format="%.3f"),
+    "涨跌幅": st.column_config.NumberColumn(format="%+.2f%%"),
+    "成交额": st.column_config.NumberColumn(format="%.0f"),
+    "总市值": st.column_config.NumberColumn(format="%.0f"),
+    "换手率": st.column_config.NumberColumn(format="%.2f%%"),
+}
+
+# 缓存表 → Arrow 表 (按对象身份记忆): 取数层缓存返回同一 DataFrame 对象, 只在其刷新后重新转换
+# 各会话线程共用此表, 查找/淘汰/写入都在锁内进行 (转换本身在锁外, 并发重复转换无害)
+_ARROW_TABLES = {}
+_ARROW_TABLES_MAX = 8
+_ARROW_LOCK = threading.Lock()
+
+
+def _arrow_table(df: pd.DataFrame) -> pa.Table:
+    """DataFrame 预转 pyarrow.Table, st.dataframe 直接发送, 免去每次重跑的 pandas→Arrow 转换"""
+    with _ARROW_LOCK:
+        ent = _ARROW_TABLES.get(id(df))
+    if ent is not None and ent[0] is df:
+        return ent[1]
+    ent = (df, pa.Table.from_pandas(df, preserve_index=False))
+    with _ARROW_LOCK:
+        _ARROW_TABLES.pop(id(df), None)
+        while len(_ARROW_TABLES) >= _ARROW_TABLES_MAX:
+            _ARROW_TABLES.pop(next(iter(_ARROW_TABLES)))
+        _ARROW_TABLES[id(df)] = ent
+    return ent[1]
+
+
+_TOOL_TABS = ["📦 ETF", "🏭 行业板块", "🔥 概念热度", "📝 券商研报"]
+
+
+def _render_etf_tab():
+    with st.spinner("ETF..."):
+        etf_df = get_etf_list()
+    if etf_df is not None and not etf_df.empty:
+        st.dataframe(_arrow_table(etf_df), use_container_width=True, height=350, column_config=_TABLE_FORMATS)
+    else:
+        st.info("ETF 数据暂不可用")
+
+
+def _render_board_tab(fetcher, limit: int, spinner: str, empty_msg: str):
+    with st.spinner(spinner):
+        df = fetcher()  # 取缓存全表 (同一对象), Arrow 表上零拷贝切片
+    if df is not None and not df.empty:
+        st.dataframe(_arrow_table(df).slice(0, limit), use_container_width=True, height=350,
+                     column_config=_TABLE_FORMATS)
+    else:
+        st.info(empty_msg)
+
+
+def _render_reports_tab():
+    with st.spinner("研报..."):
+        reports = get_research_reports(30)
+    if reports:
+        report_data = []
+        for r in reports:
+            rating_chg = ""
+            if r.get("pre_rating") and r.get("rating") and r["pre_rating"] != r["rating"]:
+                rating_chg = f"{r['pre_rating']}→{r['rating']}"
+            else:
+                rating_chg = r.get("rating", "")
+            report_data.append({
+                "股票": r.get("stock_name", ""),
+                "券商": r.get("org_name", ""),
+                "评级": rating_chg,
+                "目标价": r.get("target_price", ""),
+                "日期": r.get("report_date", ""),
+            })
+        st.dataframe(pd.DataFrame(report_data), use_container_width=True, height=350)
+    else:
+        st.info("券商研报: 需配置 Tushare PRO")
+
+
+@st.fragment
+def render_tools_tabs():
+    """工具箱 (st.tabs 会执行全部标签内容; 改用单选切换, 只取当前标签的数据, 切换只重跑本区域)"""
+    st.subheader("🧩 结构性主线与工具箱")
+
+    active = st.radio("工具箱", _TOOL_TABS, horizontal=True,
+                      label_visibility="collapsed", key="market_tools_tab")
+    if active == "📦 ETF":
+        _render_etf_tab()
+    elif active == "🏭 行业板块":
+        _render_board_tab(get_industry_board, 30, "行业...", "行业板块暂不可用")
+    elif active == "🔥 概念热度":
+        _render_board_tab(get_concept_board, 20, "概念...", "概念板块暂不可用")
+    else:
+        _render_reports_tab()
@@ -0,0 +1,135 @@
+"""
+二波形态识别模块 - 寻星情报中心
+================================================================
+pages/5_Pullback.py 的 A 杀 / N 字形判定: 页面负责取数与展示, 这里只负责核算
+模块只导入一次, numba 编译内核与串行锁在进程内所有会话间共享
+================================================================
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+try:
+    from numba import njit, prange  # 可选: 安装后形态核算走编译内核, 未安装走 pandas groupby 向量化
+except ImportError:
+    njit, prange = None, range
+
+_MIN_BARS = 40          # 形态判定所需最少 K 线数 (约两个月)
+
+_HIT_COLS = ["surge", "current_price", "target_price", "shrink_ratio"]
+
+
+def _pullback_kernel(offsets, h, l, c, v, surge_min, shrink_max):
+    """
+    逐只扫描连续切片的标量内核 (numba 编译, 多核并行): 与 groupby 版同一套 A/B/C/D 判定
+    h/l/c/v 为整表列数组 (SoA), 第 j 只股票占 [offsets[j], offsets[j+1]) 行; 返回 (命中掩码, 每只 surge/current/target/shrink)
+    """
+    k = len(offsets) - 1
+    hit = np.zeros(k, dtype=np.bool_)
+    out = np.full((k, 4), np.nan)
+    for j in prange(k):
+        s, e = offsets[j], offsets[j + 1]
+        n = e - s
+        if n < _MIN_BARS:
+            continue
+        # A. 峰值留出最近5天作为回调验证期; 过气题材 / 峰前不足 5 根 K 线直接跳过
+        p = np.argmax(h[s:e - 5])
+        if n - p > 30 or p < 5:
+            continue
+        b = np.argmin(l[s:s + p])
+        peak, base = h[s + p], l[s + b]
+        # B. 拉升幅度
+        surge = (peak - base) / base
+        if surge < surge_min:
+            continue
+        # C. 50% 黄金坑深度, 允许支撑位上下 12% 的误差宽幅
+        current = c[e - 1]
+        target = peak - (peak - base) * 0.5
+        tolerance = target * 0.12
+        if not (target - tolerance <= current <= target + tolerance):
+            continue
+        # D. 缩量断层 (NaN 比值与 groupby 版一致视为通过)
+        ratio = v[s + p + 1:e].mean() / v[s + b:s + p + 1].mean()
+        if ratio > shrink_max:
+            continue
+        hit[j] = True
+        out[j, 0], out[j, 1], out[j, 2], out[j, 3] = surge, current, target, ratio
+    return hit, out
+
+
+# numba 默认 workqueue 线程层不支持多线程并发进入并行内核, 多会话串行调用
+# (锁与编译内核放在本模块: 页面脚本每次运行都是新的 __main__, 定义在页面里每次都是新锁新内核)
+_KERNEL_LOCK = threading.Lock()
+
+if njit is not None:
+    # 不开 fastmath: 其假定无 NaN, 会改变缩量比 NaN 的判定结果; 各股票写各自的输出行, 可安全 prange
+    _pullback_kernel = njit(cache=True, parallel=True)(_pullback_kernel)
+
+
+def detect_pullback(df_all: pd.DataFrame, surge_min: float, shrink_max: float) -> pd.DataFrame:
+    """
+    寻星核心形态算法 (A 杀 / N 字形判定), 对整个长表一次性计算, 无 pandas 逐只循环
+    df_all 需按 (ts_code, trade_date) 排序; 返回命中标的的 ts_code/surge/current_price/target_price/shrink_ratio
+    """
+    if df_all.empty:
+        return pd.DataFrame(columns=["ts_code", *_HIT_COLS])
+    if njit is not None:
+        codes = df_all["ts_code"].to_numpy()
+        offsets = np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1, [len(codes)]))
+        arrays = [df_all[col].to_numpy(dtype=np.float64) for col in ("high", "low", "close", "vol")]
+        with _KERNEL_LOCK:
+            hit, out = _pullback_kernel(offsets, *arrays, surge_min, shrink_max)
+        hits = pd.DataFrame(out[hit], columns=_HIT_COLS)
+        hits.insert(0, "ts_code", codes[offsets[:-1][hit]])
+        return hits
+    return _detect_pullback_groupby(df_all, surge_min, shrink_max)
+
+
+def _detect_pullback_groupby(df_all: pd.DataFrame, surge_min: float, shrink_max: float) -> pd.DataFrame:
+    """detect_pullback 的纯 pandas 实现: cumcount 定位 + 掩码 groupby 归约"""
+    # 数据容错：停牌过久或新股导致 K线过短
+    df_all = df_all[df_all.groupby("ts_code")["close"].transform("size") >= _MIN_BARS].reset_index(drop=True)
+    if df_all.empty:
+        return pd.DataFrame(columns=["ts_code", *_HIT_COLS])
+    codes = df_all["ts_code"]
+    g = df_all.groupby("ts_code", sort=False)
+    n = g["close"].transform("size")
+    pos = g.cumcount()
+
+    # A. 寻找拉升浪的峰值 (Peak)：留出最近5天作为回调验证期，防止假突破
+    peak_row = df_all[pos < n - 5].groupby("ts_code", sort=False)["high"].idxmax()
+    stats = pd.DataFrame({
+        "n": g.size(),
+        "current_price": g["close"].last(),
+        "peak_pos": pd.Series(pos[peak_row].to_numpy(), index=peak_row.index),
+        "peak_price": pd.Series(df_all.loc[peak_row, "high"].to_numpy(), index=peak_row.index),
+    })
+    peak_pos = codes.map(stats["peak_pos"])
+
+    # 谷值 (Base)：峰值之前区间的最低点
+    base_mask = pos < peak_pos
+    base_row = df_all[base_mask].groupby("ts_code", sort=False)["low"].idxmin()
+    stats["base_pos"] = pd.Series(pos[base_row].to_numpy(), index=base_row.index)
+    stats["base_price"] = pd.Series(df_all.loc[base_row, "low"].to_numpy(), index=base_row.index)
+    base_pos = codes.map(stats["base_pos"])
+
+    # D. 缩量断层所需的拉升期 / 回调期日均量
+    impulse = (pos >= base_pos) & (pos <= peak_pos)
+    stats["impulse_vol"] = df_all.loc[impulse, "vol"].groupby(codes[impulse]).mean()
+    stats["pullback_vol"] = df_all.loc[pos > peak_pos, "vol"].groupby(codes[pos > peak_pos]).mean()
+
+    # B/C. 拉升幅度与 50% 黄金坑深度 (允许支撑位上下 12% 的误差宽幅)
+    stats["surge"] = (stats["peak_price"] - stats["base_price"]) / stats["base_price"]
+    stats["target_price"] = stats["peak_price"] - (stats["peak_price"] - stats["base_price"]) * 0.5
+    tolerance = stats["target_price"] * 0.12
+    stats["shrink_ratio"] = stats["pullback_vol"] / stats["impulse_vol"]
+
+    keep = (
+        (stats["n"] - stats["peak_pos"] <= 30)          # 波峰太久之前判定为过气题材
+        & (stats["peak_pos"] >= 5)                      # 峰前至少 5 根 K 线才能定位谷值
+        & (stats["surge"] >= surge_min)
+        & stats["current_price"].between(stats["target_price"] - tolerance, stats["target_price"] + tolerance)
+        & ~(stats["shrink_ratio"] > shrink_max)         # 放量下跌，大概率是资金抛售(A杀)，直接舍弃
+    )
+    hits = stats.loc[keep, _HIT_COLS]
+    return hits.rename_axis("ts_code").reset_index()
@@ -0,0 +1,34 @@
+"""
+界面样式模块 - 寻星情报中心
+================================================================
+渐变卡片等公共样式: 以 CSS 类集中定义，页面只输出 class 引用
+各卡片样式与卡片 HTML 拼在同一段 markdown 里输出: 只有真正绘制卡片的分支才发送样式,
+且每页只带自己用到的规则 (重跑时未重新输出的元素会被前端移除, 样式随卡片同生同灭)
+================================================================
+"""
+
+# 日报抬头卡片 (pages/3_Report.py)
+_CARD_CSS = """<style>
+.xx-card {
+    padding: 16px 20px; border-radius: 10px; margin-bottom: 20px;
+    background: linear-gradient(135deg, rgba(255,107,53,0.12), rgba(69,183,209,0.06));
+    border: 1px solid rgba(255,107,53,0.25);
+}
+.xx-card h2 { margin: 0; color: #FF6B35; }
+.xx-card p { margin: 4px 0 0; color: #999; }
+</style>
+"""
+
+# 登录卡片 (app.py)
+_LOGIN_CSS = """<style>
+.xx-login-wrap { display: flex; justify-content: center; align-items: center; min-height: 55vh; }
+.xx-login {
+    width: 400px; padding: 40px; border-radius: 16px; text-align: center;
+    background: linear-gradient(135deg, rgba(255,107,53,0.08), rgba(69,183,209,0.04));
+    border: 1px solid rgba(255,107,53,0.15);
+}
+.xx-login h1 { margin: 0 0 8px; }
+.xx-login h2 { margin: 0 0 4px; color: #FF6B35; }
+.xx-login p { margin: 0 0 24px; color: #888; font-size: 14px; }
+</style>
+"""